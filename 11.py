@@ -6,88 +6,111 @@ Generates all publication-quality figures for noble gas photoionization
 time delay study with quantum-geometric corrections.
 """
 
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.gridspec import GridSpec
-import matplotlib.patches as mpatches
-from scipy.interpolate import interp1d
-
-# Physical constants
-HARTREE_TO_EV = 27.2114
-AU_TIME_TO_AS = 24.18884326509
-Q0 = 5.369  # C_LIG * K
-ALPHA_FS = 1/137.036
-
-# Element data
-ELEMENTS = {
-    'He': {'Z': 2, 'Zeff': 1.70, 'Ncore': 0, 'Ntotal': 2, 'Ip': 24.59},
-    'Ne': {'Z': 10, 'Zeff': 3.85, 'Ncore': 2, 'Ntotal': 10, 'Ip': 21.56},
-    'Ar': {'Z': 18, 'Zeff': 5.05, 'Ncore': 10, 'Ntotal': 18, 'Ip': 15.76},
-    'Kr': {'Z': 36, 'Zeff': 5.35, 'Ncore': 28, 'Ntotal': 36, 'Ip': 14.00},
-    'Xe': {'Z': 54, 'Zeff': 6.35, 'Ncore': 46, 'Ntotal': 54, 'Ip': 12.13}
-}
 
-def coulomb_delay(Z, E):
-    """Coulomb time delay in as"""
-    return AU_TIME_TO_AS * Z / (E**(3/2))
+import qgu_model
+import qgu_trace
+from qgu_trace import span, stage, traced
+from qgu_model import (ELEMENTS, HARTREE_TO_EV, AU_TIME_TO_AS, Q0, SPECIES,
+                       coulomb_delay, cutoff_energy, species_index,
+                       isoelectronic_sequence, ion_label,
+                       energy_grid, grid_spec, delay_curve, model_digest,
+                       propagate_uncertainty)
 
-def cutoff_energy(Z, Zeff, corrections=True):
-    """Calculate cutoff energy in eV"""
-    base = (Zeff**2 / Q0) * HARTREE_TO_EV
-    
-    if not corrections:
-        return base
-    
-    # Multi-electron coupling
-    elem_data = [v for v in ELEMENTS.values() if abs(v['Zeff'] - Zeff) < 0.01][0]
-    Ncore = elem_data['Ncore']
-    Ntotal = elem_data['Ntotal']
-    alpha_multi = 0.15 + 0.30 * (Ncore / Ntotal)
-    C_multi = 1 / (1 + alpha_multi * Ncore/Ntotal)**2
-    
-    # Relativistic
-    gamma = 1 / np.sqrt(1 - (ALPHA_FS * Zeff)**2)
-    C_rel = 1 / gamma**2
-    
-    # Polarization
-    alpha_pol = 1 + 0.5 * (Ncore / 10)
-    C_pol = 1 - 0.15 * (alpha_pol / 10)
-    
-    return base * C_multi * C_rel * C_pol
+# matplotlib is imported on the first figure call (see _load_plotting)
+plt = None
+GridSpec = None
 
-def qgu_delay(Z, Zeff, E, version='v2.0'):
-    """Quantum-geometric regularized delay"""
-    if version == 'v1.0':
-        Ec = cutoff_energy(Z, Z, corrections=False)
-    else:
-        Ec = cutoff_energy(Z, Zeff, corrections=True)
-    
-    # Phenomenological interpolation
-    x = E / Ec
-    tau_coulomb = coulomb_delay(Zeff, E)
-    tau_plateau = AU_TIME_TO_AS / Ec * 1.7
-    
-    # Smooth crossover
-    weight = 1 / (1 + (x/0.7)**4)
-    return weight * tau_plateau + (1 - weight) * tau_coulomb
+def _load_plotting():
+    """Import matplotlib; compute-only users of this module never pay for it"""
+    global plt, GridSpec
+    if plt is None:
+        import matplotlib.pyplot
+        from matplotlib.gridspec import GridSpec as _GridSpec
+        plt, GridSpec = matplotlib.pyplot, _GridSpec
+    return plt
+
+# ==============================================================================
+# FIGURE OUTPUT
+# ==============================================================================
+FIGURE_FORMATS = ('pdf', 'png')
+FIGURE_DPI = 300
+PREVIEW_DPI = 100
+PREVIEW = False  # write PNGs at PREVIEW_DPI instead of FIGURE_DPI
+VECTOR_FORMATS = ('pdf', 'svg', 'eps', 'ps')
+RASTERIZE_MIN_POINTS = 2000  # denser lines and collections are rasterized in vector output
+
+def output_dpi(fmt):
+    """Resolution of the fmt output (of rasterized artists for vector formats)"""
+    return PREVIEW_DPI if PREVIEW and fmt == 'png' else FIGURE_DPI
+
+def _dense_artists(fig):
+    """Lines and collections with at least RASTERIZE_MIN_POINTS vertices"""
+    dense = []
+    for ax in fig.axes:
+        dense += [line for line in ax.lines
+                  if len(line.get_xdata()) >= RASTERIZE_MIN_POINTS]
+        dense += [c for c in ax.collections
+                  if sum(len(p.vertices) for p in c.get_paths()) >= RASTERIZE_MIN_POINTS]
+    return [artist for artist in dense if not artist.get_rasterized()]
+
+def save_figure(fig, stem, formats=FIGURE_FORMATS):
+    """Write fig as stem.<fmt> for each requested format from one layout
+
+    The tight bounding box is computed once and shared by all formats rather
+    than recomputed by every savefig call. Dense artists are rasterized in
+    vector formats only.
+    """
+    if not formats:
+        return
+    with span('layout', stem=stem):
+        bbox = fig.get_tightbbox(fig.canvas.get_renderer()).padded(
+            plt.rcParams['savefig.pad_inches'])
+    dense = _dense_artists(fig)
+    for fmt in formats:
+        for artist in dense:
+            artist.set_rasterized(fmt in VECTOR_FORMATS)
+        with span(f'savefig.{fmt}', stem=stem):
+            fig.savefig(f'{stem}.{fmt}', dpi=output_dpi(fmt), bbox_inches=bbox)
+    for artist in dense:
+        artist.set_rasterized(False)
 
 # ==============================================================================
 # FIGURE 1: Helium Time Delays
 # ==============================================================================
-def generate_fig1_helium():
-    """Time delay vs energy for He with three models"""
+@traced
+def generate_fig1_helium(formats=FIGURE_FORMATS, uncertainty=None, tol=None):
+    """Time delay vs energy for He with three models
+
+    uncertainty, a sigma dict for propagate_uncertainty, replaces the fixed
+    residual band in panel (d) with the propagated 95% band. tol switches to
+    adaptive energy grids with that interpolation tolerance.
+    """
+    _load_plotting()
+    stage('compute')
     fig, axes = plt.subplots(2, 2, figsize=(12, 10))
     
-    E_range = np.logspace(-0.3, 1.7, 200)  # 0.5 to 50 eV
-    
     He = ELEMENTS['He']
+    curves = [(He['Z'], He['Z'], 'v1.0'), (He['Z'], He['Zeff'], 'v2.0')]
+    grid = grid_spec('logspace', -0.3, 1.7, 200, tol, curves)  # 0.5 to 50 eV
+    E_range = energy_grid(grid)
+    
     tau_coulomb = coulomb_delay(He['Zeff'], E_range)
-    tau_v10 = np.array([qgu_delay(He['Z'], He['Z'], E, 'v1.0') for E in E_range])
-    tau_v20 = np.array([qgu_delay(He['Z'], He['Zeff'], E, 'v2.0') for E in E_range])
+    tau_v10 = delay_curve(He['Z'], He['Z'], grid, 'v1.0')
+    tau_v20 = delay_curve(He['Z'], He['Zeff'], grid, 'v2.0')
     
     Ec_v10 = cutoff_energy(He['Z'], He['Z'], False)
     Ec_v20 = cutoff_energy(He['Z'], He['Zeff'], True)
     
+    stage('panel (a)')
     # Panel (a): Log-log comparison
     ax = axes[0, 0]
     ax.loglog(E_range, tau_coulomb, 'r--', lw=2.5, label='Coulomb divergence', alpha=0.7)
@@ -106,12 +129,14 @@ def generate_fig1_helium():
     ax.grid(True, alpha=0.3, which='both')
     ax.set_ylim([5, 2000])
     
+    stage('panel (b)')
     # Panel (b): Linear near threshold
     ax = axes[0, 1]
-    E_thresh = np.linspace(0.5, 10, 100)
+    grid_thresh = grid_spec('linspace', 0.5, 10, 100, tol, curves)
+    E_thresh = energy_grid(grid_thresh)
     tau_c_t = coulomb_delay(He['Zeff'], E_thresh)
-    tau_v10_t = np.array([qgu_delay(He['Z'], He['Z'], E, 'v1.0') for E in E_thresh])
-    tau_v20_t = np.array([qgu_delay(He['Z'], He['Zeff'], E, 'v2.0') for E in E_thresh])
+    tau_v10_t = delay_curve(He['Z'], He['Z'], grid_thresh, 'v1.0')
+    tau_v20_t = delay_curve(He['Z'], He['Zeff'], grid_thresh, 'v2.0')
     
     ax.plot(E_thresh, tau_c_t, 'r--', lw=2.5, label='Coulomb', alpha=0.7)
     ax.plot(E_thresh, tau_v10_t, 'b-', lw=2, label='v1.0')
@@ -127,6 +152,7 @@ def generate_fig1_helium():
     ax.grid(True, alpha=0.3)
     ax.set_ylim([0, 700])
     
+    stage('panel (c)')
     # Panel (c): Suppression ratio
     ax = axes[1, 0]
     ratio_v10 = tau_v10 / tau_coulomb
@@ -145,6 +171,7 @@ def generate_fig1_helium():
     ax.grid(True, alpha=0.3)
     ax.set_ylim([0, 1.2])
     
+    stage('panel (d)')
     # Panel (d): Residuals
     ax = axes[1, 1]
     residual_v20 = tau_v20 - tau_coulomb
@@ -153,8 +180,13 @@ def generate_fig1_helium():
     ax.axhline(0, color='red', ls='--', lw=1.5, alpha=0.5)
     ax.axvline(Ec_v20, color='green', ls=':', lw=1.5, alpha=0.6)
     
-    ax.fill_between(E_range, -2.5, 2.5, alpha=0.2, color='gray', 
-                     label='Numerical uncertainty')
+    if uncertainty is None:
+        ax.fill_between(E_range, -2.5, 2.5, alpha=0.2, color='gray', 
+                         label='Numerical uncertainty')
+    else:
+        band = propagate_uncertainty(He['Z'], E_range, uncertainty)['tau']
+        ax.fill_between(E_range, band[0] - tau_coulomb, band[-1] - tau_coulomb,
+                        alpha=0.2, color='gray', label='Model uncertainty (95%)')
     
     ax.set_xlabel('Energy (eV)', fontsize=12)
     ax.set_ylabel('Residual (as)', fontsize=12)
@@ -163,35 +195,50 @@ def generate_fig1_helium():
     ax.grid(True, alpha=0.3)
     ax.set_ylim([-600, 50])
     
+    stage('tight_layout')
     plt.tight_layout()
-    plt.savefig('fig1_helium_delays.pdf', dpi=300, bbox_inches='tight')
-    plt.savefig('fig1_helium_delays.png', dpi=300, bbox_inches='tight')
-    print("✓ Figure 1 saved: fig1_helium_delays.pdf/.png")
+    stage('savefig')
+    save_figure(fig, 'fig1_helium_delays', formats)
+    if formats:
+        print(f"✓ Figure 1 saved: fig1_helium_delays.{'/.'.join(formats)}")
     return fig
 
 # ==============================================================================
 # FIGURE 2: All Elements Comparison
 # ==============================================================================
-def generate_fig2_all_elements():
-    """Time delays for all noble gases"""
+@traced
+def generate_fig2_all_elements(formats=FIGURE_FORMATS, uncertainty=None, tol=None):
+    """Time delays for all noble gases
+
+    uncertainty, a sigma dict for propagate_uncertainty, adds 95% bands to
+    panel (a). tol switches to an adaptive energy grid.
+    """
+    _load_plotting()
+    stage('compute')
     fig = plt.figure(figsize=(14, 6))
     gs = GridSpec(1, 2, width_ratios=[1.2, 1])
     
-    E_range = np.logspace(-1, 2, 150)  # 0.1 to 100 eV
+    curves = [(d['Z'], d['Zeff'], 'v2.0') for d in ELEMENTS.values()]
+    grid = grid_spec('logspace', -1, 2, 150, tol, curves)  # 0.1 to 100 eV
+    E_range = energy_grid(grid)
     
     colors = {'He': '#e74c3c', 'Ne': '#3498db', 'Ar': '#2ecc71', 
               'Kr': '#f39c12', 'Xe': '#9b59b6'}
     
+    stage('panel (a)')
     # Panel (a): Absolute energies
     ax1 = fig.add_subplot(gs[0])
     
     for elem, data in ELEMENTS.items():
-        tau = np.array([qgu_delay(data['Z'], data['Zeff'], E, 'v2.0') for E in E_range])
+        tau = delay_curve(data['Z'], data['Zeff'], grid, 'v2.0')
         Ec = cutoff_energy(data['Z'], data['Zeff'], True)
         
         ax1.loglog(E_range, tau, '-', lw=2.5, color=colors[elem], 
                    label=f"{elem} ($E_c$={Ec:.1f} eV)", alpha=0.85)
         ax1.axvline(Ec, color=colors[elem], ls=':', lw=1, alpha=0.4)
+        if uncertainty is not None:
+            band = propagate_uncertainty(data['Z'], E_range, uncertainty)['tau']
+            ax1.fill_between(E_range, band[0], band[-1], color=colors[elem], alpha=0.15)
     
     # Coulomb reference
     tau_ref = coulomb_delay(2, E_range)
@@ -204,13 +251,14 @@ def generate_fig2_all_elements():
     ax1.grid(True, alpha=0.3, which='both')
     ax1.set_ylim([5, 1000])
     
+    stage('panel (b)')
     # Panel (b): Normalized by cutoff
     ax2 = fig.add_subplot(gs[1])
     
     for elem, data in ELEMENTS.items():
         Ec = cutoff_energy(data['Z'], data['Zeff'], True)
         E_norm = E_range / Ec
-        tau = np.array([qgu_delay(data['Z'], data['Zeff'], E, 'v2.0') for E in E_range])
+        tau = delay_curve(data['Z'], data['Zeff'], grid, 'v2.0')
         tau_norm = tau / (AU_TIME_TO_AS / Ec * 1.7)
         
         ax2.loglog(E_norm, tau_norm, '-', lw=2, color=colors[elem], 
@@ -227,17 +275,22 @@ def generate_fig2_all_elements():
     ax2.set_xlim([0.01, 100])
     ax2.set_ylim([0.5, 20])
     
+    stage('tight_layout')
     plt.tight_layout()
-    plt.savefig('fig2_all_elements.pdf', dpi=300, bbox_inches='tight')
-    plt.savefig('fig2_all_elements.png', dpi=300, bbox_inches='tight')
-    print("✓ Figure 2 saved: fig2_all_elements.pdf/.png")
+    stage('savefig')
+    save_figure(fig, 'fig2_all_elements', formats)
+    if formats:
+        print(f"✓ Figure 2 saved: fig2_all_elements.{'/.'.join(formats)}")
     return fig
 
 # ==============================================================================
 # FIGURE 3: Scaling Behavior Z vs Z_eff
 # ==============================================================================
-def generate_fig3_scaling():
+@traced
+def generate_fig3_scaling(formats=FIGURE_FORMATS):
     """Power law scaling comparison"""
+    _load_plotting()
+    stage('compute')
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(13, 6))
     
     Z_vals = np.array([ELEMENTS[e]['Z'] for e in ['He', 'Ne', 'Ar', 'Kr', 'Xe']])
@@ -245,9 +298,9 @@ def generate_fig3_scaling():
     
     Ec_Z = np.array([(Z**2 / Q0) * HARTREE_TO_EV for Z in Z_vals])
     Ec_Zeff_only = np.array([(Zeff**2 / Q0) * HARTREE_TO_EV for Zeff in Zeff_vals])
-    Ec_full = np.array([cutoff_energy(ELEMENTS[e]['Z'], ELEMENTS[e]['Zeff'], True) 
-                        for e in ['He', 'Ne', 'Ar', 'Kr', 'Xe']])
+    Ec_full = cutoff_energy(Z_vals, Zeff_vals, True)
     
+    stage('panel (a)')
     # Panel (a): E_cutoff vs Z
     ax1.loglog(Z_vals, Ec_Z, 'ro-', markersize=10, lw=2.5, label=r'$E_{\rm cutoff} \propto Z^2$', alpha=0.7)
     ax1.loglog(Z_vals, Ec_Zeff_only, 'bs-', markersize=10, lw=2.5, label=r'$E_{\rm cutoff} \propto Z_{\rm eff}^2$')
@@ -276,6 +329,7 @@ def generate_fig3_scaling():
     ax1.legend(loc='upper left', fontsize=10)
     ax1.grid(True, alpha=0.3, which='both')
     
+    stage('panel (b)')
     # Panel (b): Reduction factors
     reduction = Ec_Z / Ec_full
     
@@ -294,42 +348,33 @@ def generate_fig3_scaling():
     ax2.set_xticks(Z_vals)
     ax2.set_xticklabels(['He', 'Ne', 'Ar', 'Kr', 'Xe'])
     
+    stage('tight_layout')
     plt.tight_layout()
-    plt.savefig('fig3_scaling.pdf', dpi=300, bbox_inches='tight')
-    plt.savefig('fig3_scaling.png', dpi=300, bbox_inches='tight')
-    print("✓ Figure 3 saved: fig3_scaling.pdf/.png")
+    stage('savefig')
+    save_figure(fig, 'fig3_scaling', formats)
+    if formats:
+        print(f"✓ Figure 3 saved: fig3_scaling.{'/.'.join(formats)}")
     return fig
 
 # ==============================================================================
 # FIGURE 4: Isoelectronic Sequences
 # ==============================================================================
-def generate_fig4_isoelectronic():
+@traced
+def generate_fig4_isoelectronic(formats=FIGURE_FORMATS):
     """Isoelectronic sequence validation"""
+    _load_plotting()
+    stage('compute')
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(13, 6))
     
-    # 10-electron sequence
-    seq_10e = [
-        {'ion': 'Ne', 'Z': 10, 'sigma': 6.15},
-        {'ion': 'Na⁺', 'Z': 11, 'sigma': 6.15},
-        {'ion': 'Mg²⁺', 'Z': 12, 'sigma': 6.15},
-        {'ion': 'Al³⁺', 'Z': 13, 'sigma': 6.15}
-    ]
-    
-    # 18-electron sequence
-    seq_18e = [
-        {'ion': 'Ar', 'Z': 18, 'sigma': 12.95},
-        {'ion': 'K⁺', 'Z': 19, 'sigma': 12.95},
-        {'ion': 'Ca²⁺', 'Z': 20, 'sigma': 12.95},
-        {'ion': 'Sc³⁺', 'Z': 21, 'sigma': 12.95}
-    ]
-    
-    for seq, ax, title, color in [(seq_10e, ax1, '10-electron (Ne-like)', 'blue'),
-                                    (seq_18e, ax2, '18-electron (Ar-like)', 'green')]:
-        Z_minus_sigma_sq = np.array([(ion['Z'] - ion['sigma'])**2 for ion in seq])
-        Zeff_vals = np.array([ion['Z'] - ion['sigma'] for ion in seq])
-        
-        # Simplified calculation (no full corrections for ions)
-        Ec_vals = (Zeff_vals**2 / Q0) * HARTREE_TO_EV * 0.9  # approximate correction
+    stage('panels')
+    for i, (N, ax, title, color) in enumerate([(10, ax1, '10-electron (Ne-like)', 'blue'),
+                                              (18, ax2, '18-electron (Ar-like)', 'green')]):
+        # Neutral atom and its first three ions, straight from SPECIES (which
+        # carries the neutral atom's screening along the sequence)
+        Z = isoelectronic_sequence(N, 'Z', 4).astype(int)
+        charge = isoelectronic_sequence(N, 'charge', 4).astype(int)
+        Z_minus_sigma_sq = isoelectronic_sequence(N, 'Zeff', 4)**2
+        Ec_vals = isoelectronic_sequence(N, 'E_cutoff', 4)
         
         ax.plot(Z_minus_sigma_sq, Ec_vals, 'o-', markersize=12, lw=2.5, 
                 color=color, label='Predicted')
@@ -340,38 +385,49 @@ def generate_fig4_isoelectronic():
         ax.plot(fit_x, slope*fit_x + intercept, '--', color=color, lw=2, alpha=0.6,
                 label=f'Fit: slope={(slope*Q0/HARTREE_TO_EV):.2f}/Q₀')
         
-        for i, ion in enumerate(seq):
-            ax.text(Z_minus_sigma_sq[i], Ec_vals[i]*1.08, ion['ion'], 
+        for x, Ec, Zi, q in zip(Z_minus_sigma_sq, Ec_vals, Z, charge):
+            ax.text(x, Ec*1.08, ion_label(Zi, q), 
                     fontsize=11, ha='center', fontweight='bold')
         
         ax.set_xlabel(r'$(Z - \sigma)^2$', fontsize=13)
         ax.set_ylabel('Cutoff energy (eV)', fontsize=13)
-        ax.set_title(f'({chr(97+list([(seq_10e, ax1), (seq_18e, ax2)]).index((seq, ax)))} {title}', 
+        ax.set_title(f'({chr(97+i)}) {title}', 
                      fontsize=14, fontweight='bold')
         ax.legend(loc='upper left', fontsize=11)
         ax.grid(True, alpha=0.3)
     
+    stage('tight_layout')
     plt.tight_layout()
-    plt.savefig('fig4_isoelectronic.pdf', dpi=300, bbox_inches='tight')
-    plt.savefig('fig4_isoelectronic.png', dpi=300, bbox_inches='tight')
-    print("✓ Figure 4 saved: fig4_isoelectronic.pdf/.png")
+    stage('savefig')
+    save_figure(fig, 'fig4_isoelectronic', formats)
+    if formats:
+        print(f"✓ Figure 4 saved: fig4_isoelectronic.{'/.'.join(formats)}")
     return fig
 
 # ==============================================================================
 # FIGURE 5: Energy Dependence for Neon
 # ==============================================================================
-def generate_fig5_neon_detail():
-    """Detailed energy dependence for neon"""
+@traced
+def generate_fig5_neon_detail(formats=FIGURE_FORMATS, tol=None):
+    """Detailed energy dependence for neon
+
+    tol switches to an adaptive energy grid.
+    """
+    _load_plotting()
+    stage('compute')
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(13, 6))
     
     Ne = ELEMENTS['Ne']
-    E_range = np.logspace(-1, 2, 200)  # 0.1 to 100 eV
+    grid = grid_spec('logspace', -1, 2, 200, tol,
+                     [(Ne['Z'], Ne['Zeff'], 'v2.0')])  # 0.1 to 100 eV
+    E_range = energy_grid(grid)
     
     tau_coulomb = coulomb_delay(Ne['Zeff'], E_range)
-    tau_qgu = np.array([qgu_delay(Ne['Z'], Ne['Zeff'], E, 'v2.0') for E in E_range])
+    tau_qgu = delay_curve(Ne['Z'], Ne['Zeff'], grid, 'v2.0')
     
     Ec = cutoff_energy(Ne['Z'], Ne['Zeff'], True)
     
+    stage('panel (a)')
     # Panel (a): Log-log with regions
     ax1.loglog(E_range, tau_coulomb, 'r--', lw=2.5, label='Coulomb $E^{-3/2}$', alpha=0.7)
     ax1.loglog(E_range, tau_qgu, 'b-', lw=3, label='QGU regularized')
@@ -397,6 +453,7 @@ def generate_fig5_neon_detail():
     ax1.grid(True, alpha=0.3, which='both')
     ax1.set_ylim([5, 500])
     
+    stage('panel (b)')
     # Panel (b): Logarithmic derivative
     log_E = np.log(E_range)
     log_tau = np.log(tau_qgu)
@@ -416,51 +473,33 @@ def generate_fig5_neon_detail():
     ax2.grid(True, alpha=0.3)
     ax2.set_ylim([-2, 0.5])
     
+    stage('tight_layout')
     plt.tight_layout()
-    plt.savefig('fig5_neon_detail.pdf', dpi=300, bbox_inches='tight')
-    plt.savefig('fig5_neon_detail.png', dpi=300, bbox_inches='tight')
-    print("✓ Figure 5 saved: fig5_neon_detail.pdf/.png")
+    stage('savefig')
+    save_figure(fig, 'fig5_neon_detail', formats)
+    if formats:
+        print(f"✓ Figure 5 saved: fig5_neon_detail.{'/.'.join(formats)}")
     return fig
 
 # ==============================================================================
 # FIGURE 6: Correction Factor Breakdown
 # ==============================================================================
-def generate_fig6_corrections():
+@traced
+def generate_fig6_corrections(formats=FIGURE_FORMATS):
     """Visualize correction factor contributions"""
+    _load_plotting()
+    stage('compute')
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(13, 6))
     
     elements = ['He', 'Ne', 'Ar', 'Kr', 'Xe']
     
-    # Calculate corrections for each element
-    data = []
-    for elem in elements:
-        d = ELEMENTS[elem]
-        Ncore = d['Ncore']
-        Ntotal = d['Ntotal']
-        Zeff = d['Zeff']
-        
-        # Multi-electron
-        alpha_multi = 0.15 + 0.30 * (Ncore / Ntotal)
-        C_multi = 1 / (1 + alpha_multi * Ncore/Ntotal)**2
-        
-        # Relativistic
-        gamma = 1 / np.sqrt(1 - (ALPHA_FS * Zeff)**2)
-        C_rel = 1 / gamma**2
-        
-        # Polarization
-        alpha_pol = 1 + 0.5 * (Ncore / 10)
-        C_pol = 1 - 0.15 * (alpha_pol / 10)
-        
-        C_total = C_multi * C_rel * C_pol
-        
-        data.append({
-            'elem': elem,
-            'C_multi': C_multi,
-            'C_rel': C_rel,
-            'C_pol': C_pol,
-            'C_total': C_total
-        })
+    # Correction factors from the species table
+    rows = species_index([ELEMENTS[e]['Z'] for e in elements])
+    C_multi_vals = SPECIES['C_multi'][rows]
+    C_rel_vals = SPECIES['C_rel'][rows]
+    C_pol_vals = SPECIES['C_pol'][rows]
     
+    stage('panel (a)')
     # Panel (a): Stacked bar showing cumulative effect
     x = np.arange(len(elements))
     width = 0.6
@@ -468,9 +507,9 @@ def generate_fig6_corrections():
     # Start from Z² baseline
     Ec_Z = np.array([(ELEMENTS[e]['Z']**2 / Q0) * HARTREE_TO_EV for e in elements])
     Ec_Zeff = np.array([(ELEMENTS[e]['Zeff']**2 / Q0) * HARTREE_TO_EV for e in elements])
-    Ec_multi = Ec_Zeff * np.array([d['C_multi'] for d in data])
-    Ec_rel = Ec_multi * np.array([d['C_rel'] for d in data])
-    Ec_final = Ec_rel * np.array([d['C_pol'] for d in data])
+    Ec_multi = Ec_Zeff * C_multi_vals
+    Ec_rel = Ec_multi * C_rel_vals
+    Ec_final = Ec_rel * C_pol_vals
     
     ax1.bar(x, Ec_Z, width, label='Bare $Z^2$', color='#e74c3c', alpha=0.7)
     ax1.bar(x, Ec_Zeff, width, label='After $Z_{eff}$', color='#3498db', alpha=0.8)
@@ -486,11 +525,8 @@ def generate_fig6_corrections():
     ax1.set_yscale('log')
     ax1.grid(True, alpha=0.3, axis='y')
     
+    stage('panel (b)')
     # Panel (b): Individual factors
-    C_multi_vals = [d['C_multi'] for d in data]
-    C_rel_vals = [d['C_rel'] for d in data]
-    C_pol_vals = [d['C_pol'] for d in data]
-    
     ax2.plot(x, C_multi_vals, 'o-', markersize=10, lw=2.5, label='Multi-electron', color='#2ecc71')
     ax2.plot(x, C_rel_vals, 's-', markersize=10, lw=2.5, label='Relativistic', color='#e67e22')
     ax2.plot(x, C_pol_vals, '^-', markersize=10, lw=2.5, label='Polarization', color='#3498db')
@@ -506,35 +542,215 @@ def generate_fig6_corrections():
     ax2.grid(True, alpha=0.3)
     ax2.set_ylim([0.65, 1.05])
     
+    stage('tight_layout')
     plt.tight_layout()
-    plt.savefig('fig6_corrections.pdf', dpi=300, bbox_inches='tight')
-    plt.savefig('fig6_corrections.png', dpi=300, bbox_inches='tight')
-    print("✓ Figure 6 saved: fig6_corrections.pdf/.png")
+    stage('savefig')
+    save_figure(fig, 'fig6_corrections', formats)
+    if formats:
+        print(f"✓ Figure 6 saved: fig6_corrections.{'/.'.join(formats)}")
     return fig
 
+# ==============================================================================
+# FIGURE BUILD DRIVER
+# ==============================================================================
+FIGURES = {
+    1: (generate_fig1_helium, 'fig1_helium_delays'),
+    2: (generate_fig2_all_elements, 'fig2_all_elements'),
+    3: (generate_fig3_scaling, 'fig3_scaling'),
+    4: (generate_fig4_isoelectronic, 'fig4_isoelectronic'),
+    5: (generate_fig5_neon_detail, 'fig5_neon_detail'),
+    6: (generate_fig6_corrections, 'fig6_corrections'),
+}
+
+MANIFEST_FILE = 'figures_manifest.json'
+
+def figure_hash(num, fmt):
+    """Content hash of the inputs that determine figure `num` in format fmt
+
+    Covers the physical constants, element data, the source of the model and
+    of the figure function (which holds the energy grids), how the output is
+    written (resolution and which artists are rasterized) and the matplotlib
+    version.
+    """
+    h = hashlib.sha256(model_digest().encode())
+    for func in (energy_grid, delay_curve, save_figure, _dense_artists, FIGURES[num][0]):
+        h.update(inspect.getsource(func).encode())
+    import matplotlib
+    h.update(f'{fmt} dpi-{output_dpi(fmt)} rasterize-{RASTERIZE_MIN_POINTS}-{VECTOR_FORMATS} '
+             f'matplotlib-{matplotlib.__version__}'.encode())
+    return h.hexdigest()
+
+def check_formats(formats):
+    """Raise ValueError unless matplotlib can write every format in formats"""
+    from matplotlib.backend_bases import FigureCanvasBase
+    supported = FigureCanvasBase.get_supported_filetypes()
+    unknown = [fmt for fmt in formats if fmt not in supported]
+    if unknown:
+        raise ValueError(f"unsupported figure format(s) {', '.join(unknown)}; "
+                         f"matplotlib writes {', '.join(sorted(supported))}")
+
+def _load_manifest(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def _is_current(manifest, num, fmt, digest):
+    """True if the artifact exists and was built from inputs hashing to digest"""
+    stem = FIGURES[num][1]
+    entry = manifest.get(stem, {}).get(fmt)
+    return (entry is not None and entry['hash'] == digest
+            and os.path.exists(f'{stem}.{fmt}'))
+
+def _write_manifest(path, records):
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(records, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+def _init_worker(curve_cache_dir=None, trace=False, preview=False):
+    """Worker initializer: render off-screen, share the curve store and
+    record spans if the parent is tracing"""
+    global PREVIEW
+    qgu_model.CURVE_CACHE_DIR = curve_cache_dir
+    PREVIEW = preview
+    if trace:
+        qgu_trace.enable()
+    _load_plotting().switch_backend('Agg')
+
+def _render_figure(num, formats):
+    """Build figure `num` once and write it in every format of `formats`
+
+    Returns the wall time and the trace events recorded while rendering.
+    The figure is closed and cleared afterwards so its memory is freed
+    before the next task.
+    """
+    t0 = time.perf_counter()
+    fig = FIGURES[num][0](formats=formats)
+    plt.close(fig)
+    fig.clear()
+    return num, formats, time.perf_counter() - t0, qgu_trace.collect()
+
+def pool_size(workers, n_tasks):
+    """Worker processes build_figures uses for n_tasks figures"""
+    return min(workers or os.cpu_count() or 1, n_tasks)
+
+def build_figures(figures=None, formats=FIGURE_FORMATS, workers=None,
+                  force=False, manifest=MANIFEST_FILE, curve_cache=None,
+                  preview=False):
+    """Render out-of-date figures in a process pool, one task per figure
+
+    Artifacts whose input hash matches the manifest entry are skipped unless
+    force is set; a figure with any stale format is built once and written in
+    all its stale formats. Returns {figure: {format: seconds}}, where the
+    formats written together share the figure's time, and None marks
+    artifacts that were up to date. curve_cache is a directory in which
+    workers persist delay curves; preview writes PNGs at PREVIEW_DPI. When
+    qgu_trace is enabled, worker spans are merged into this process's trace.
+
+    Formats matplotlib cannot write raise ValueError before anything is
+    built. The manifest is rewritten as each figure completes, so if one
+    fails, the others are still recorded before its exception is raised.
+    """
+    global PREVIEW
+    check_formats(formats)
+    PREVIEW = preview  # figure_hash depends on it
+    figures = sorted(FIGURES) if figures is None else list(figures)
+    records = _load_manifest(manifest)
+    hashes = {(num, fmt): figure_hash(num, fmt) for num in figures for fmt in formats}
+    stale = {num: tuple(fmt for fmt in formats
+                        if force or not _is_current(records, num, fmt, hashes[num, fmt]))
+             for num in figures}
+    tasks = [(num, fmts) for num, fmts in stale.items() if fmts]
+    timings = {num: dict.fromkeys(formats) for num in figures}
+    
+    def record(num, fmts, seconds, events):
+        qgu_trace.merge(events)
+        for fmt in fmts:
+            timings[num][fmt] = seconds
+            records.setdefault(FIGURES[num][1], {})[fmt] = {
+                'hash': hashes[num, fmt], 'seconds': round(seconds, 3)}
+        _write_manifest(manifest, records)
+
+    workers = pool_size(workers, len(tasks))
+    initargs = (curve_cache, qgu_trace.ENABLED, preview)
+    if tasks and workers <= 1:
+        _init_worker(*initargs)
+        for num, fmts in tasks:
+            record(*_render_figure(num, fmts))
+    elif tasks:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=initargs) as pool:
+            futures = [pool.submit(_render_figure, num, fmts) for num, fmts in tasks]
+            errors = []
+            for future in as_completed(futures):
+                if future.exception() is None:
+                    record(*future.result())
+                else:
+                    errors.append(future.exception())
+        if errors:
+            raise errors[0]
+    return timings
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--figures', type=int, nargs='+', choices=sorted(FIGURES),
+                        default=sorted(FIGURES), help='figure numbers to build')
+    parser.add_argument('--formats', nargs='+', default=list(FIGURE_FORMATS),
+                        help='output formats (default: pdf png)')
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count(),
+                        help='number of worker processes (default: all cores)')
+    parser.add_argument('--force', action='store_true',
+                        help='rebuild figures even if their inputs are unchanged')
+    parser.add_argument('--manifest', default=MANIFEST_FILE,
+                        help=f'build manifest path (default: {MANIFEST_FILE})')
+    parser.add_argument('--preview', action='store_true',
+                        help=f'write PNGs at {PREVIEW_DPI} dpi instead of {FIGURE_DPI}')
+    parser.add_argument('--curve-cache', metavar='DIR',
+                        help='persist computed delay curves in DIR')
+    parser.add_argument('--trace', metavar='PATH',
+                        help='write a timing trace (Chrome JSON, or CSV if PATH ends in .csv)')
+    args = parser.parse_args(argv)
+    try:
+        check_formats(args.formats)
+    except ValueError as error:
+        parser.error(str(error))
+    return args
+
 # ==============================================================================
 # MAIN EXECUTION
 # ==============================================================================
 if __name__ == "__main__":
+    args = _parse_args()
+    if args.trace:
+        qgu_trace.enable()
+    
     print("\n" + "="*70)
     print("GENERATING ALL PUBLICATION FIGURES")
     print("="*70 + "\n")
     
-    generate_fig1_helium()
-    generate_fig2_all_elements()
-    generate_fig3_scaling()
-    generate_fig4_isoelectronic()
-    generate_fig5_neon_detail()
-    generate_fig6_corrections()
+    t0 = time.perf_counter()
+    timings = build_figures(args.figures, args.formats, args.workers,
+                            force=args.force, manifest=args.manifest,
+                            curve_cache=args.curve_cache, preview=args.preview)
+    elapsed = time.perf_counter() - t0
     
     print("\n" + "="*70)
     print("✅ ALL FIGURES GENERATED SUCCESSFULLY")
     print("="*70)
     print("\nFiles created:")
-    print("  - fig1_helium_delays.pdf/.png")
-    print("  - fig2_all_elements.pdf/.png")
-    print("  - fig3_scaling.pdf/.png")
-    print("  - fig4_isoelectronic.pdf/.png")
-    print("  - fig5_neon_detail.pdf/.png")
-    print("  - fig6_corrections.pdf/.png")
+    for num, per_format in timings.items():
+        stem = FIGURES[num][1]
+        built = [fmt for fmt in args.formats if per_format[fmt] is not None]
+        current = [fmt for fmt in args.formats if per_format[fmt] is None]
+        times = ', '.join(([f"{'+'.join(built)} {per_format[built[0]]:.2f} s"] if built else [])
+                          + ([f"{'+'.join(current)} up to date"] if current else []))
+        print(f"  - {stem}.{'/.'.join(args.formats)}  ({times})")
+    n_built = sum(any(t is not None for t in per_format.values())
+                  for per_format in timings.values())
+    print(f"\nWall time: {elapsed:.2f} s with {pool_size(args.workers, n_built)} worker(s)")
+    if args.trace:
+        qgu_trace.write_trace(args.trace)
+        print(f"Trace written to {args.trace}")
     print("\nReady for LaTeX inclusion!")
\ No newline at end of file
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the Delay Model and Figure Pipeline
+==================================================
+Times coulomb_delay, cutoff_energy, qgu_delay (float64 and float32) and its table lookup over
+energy grids from 1e2 to 1e7 points for every element, and each generate_fig* split into compute
+(curves, layout) and savefig. Results are written as JSON and can be compared
+against a stored baseline:
+
+    python bench_qgu.py -o bench.json
+    python bench_qgu.py --baseline bench.json
+"""
+
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import qgu_model
+from qgu_lookup import build_delay_table, table_delay
+from qgu_model import ELEMENTS, coulomb_delay, cutoff_energy, qgu_delay
+
+SIZES = [10**k for k in range(2, 8)]
+FIGURE_REPEAT = 5  # runs per figure timing; a single run is too noisy to compare
+FIGURE_THRESHOLD = 1.5  # figure timings vary by up to ~1.35x between runs even so
+SCALAR_CALLS = 1000  # scalar lookups per timed call, to get above the timer overhead
+BATCH_MAX_SIZE = 10**6  # larger all-element batches need several GB
+
+def best_time(func, repeat=5, budget=2.0):
+    """Best of `repeat` wall times, stopping early once `budget` seconds pass"""
+    best = float('inf')
+    start = time.perf_counter()
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - t0)
+        if time.perf_counter() - start > budget:
+            break
+    return best
+
+def bench_model(sizes=SIZES):
+    """Model timings keyed 'function/element/size'; size 'scalar' is one float E"""
+    results = {}
+    Z = np.array([d['Z'] for d in ELEMENTS.values()])
+    Zeff = np.array([d['Zeff'] for d in ELEMENTS.values()])
+    table = build_delay_table()
+    for elem in ELEMENTS:
+        calls = range(SCALAR_CALLS)
+        results[f'table_delay/{elem}/scalar'] = best_time(
+            lambda: [table_delay(table, elem, 3.7) for _ in calls]) / SCALAR_CALLS
+    for n in sizes:
+        E = np.logspace(-1, 2, n)
+        E32 = E.astype(np.float32)
+        for elem, d in ELEMENTS.items():
+            results[f'coulomb_delay/{elem}/{n}'] = best_time(
+                lambda: coulomb_delay(d['Zeff'], E))
+            results[f'qgu_delay/{elem}/{n}'] = best_time(
+                lambda: qgu_delay(d['Z'], d['Zeff'], E))
+            results[f'qgu_delay_f32/{elem}/{n}'] = best_time(
+                lambda: qgu_delay(d['Z'], d['Zeff'], E32, precision='float32'))
+            results[f'qgu_delay_v1/{elem}/{n}'] = best_time(
+                lambda: qgu_delay(d['Z'], d['Z'], E, 'v1.0'))
+            results[f'table_delay/{elem}/{n}'] = best_time(
+                lambda: table_delay(table, elem, E))
+        if n <= BATCH_MAX_SIZE:
+            results[f'qgu_delay/all/{n}'] = best_time(
+                lambda: qgu_delay(Z[:, None], Zeff[:, None], E))
+        species = np.resize(np.arange(len(Z)), n)
+        results[f'cutoff_energy/all/{n}'] = best_time(
+            lambda: cutoff_energy(Z[species], Zeff[species]))
+    return results
+
+def bench_figures(figures=None, formats=('pdf', 'png'), repeat=FIGURE_REPEAT):
+    """Per-figure timings keyed 'figN/compute', 'figN/savefig/<fmt>' and
+    'figN/savefig/all' (every format from one layout)
+
+    Each is the best of `repeat` runs, however long they take; every compute
+    run starts from an empty curve cache, as a fresh build would.
+    """
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    fig_module = importlib.import_module('11')
+    plt = fig_module._load_plotting()
+    plt.switch_backend('Agg')
+
+    def compute(func):
+        qgu_model._delay_curve.cache_clear()
+        with contextlib.redirect_stdout(io.StringIO()):
+            return func(formats=())
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for num in figures or sorted(fig_module.FIGURES):
+            func, stem = fig_module.FIGURES[num]
+            results[f'fig{num}/compute'] = best_time(
+                lambda: plt.close(compute(func)), repeat, budget=float('inf'))
+            fig = compute(func)
+            for fmt in (*formats, 'all'):
+                save = formats if fmt == 'all' else (fmt,)
+                results[f'fig{num}/savefig/{fmt}'] = best_time(
+                    lambda: fig_module.save_figure(fig, os.path.join(tmp, stem), save),
+                    repeat, budget=float('inf'))
+            plt.close(fig)
+    return results
+
+NOISE_FLOOR = 50e-6  # slowdowns smaller than this (s) are timer noise
+
+def compare(results, baseline, threshold, figure_threshold=FIGURE_THRESHOLD):
+    """Print the ratio to the baseline per benchmark; return the regressions
+
+    Figure timings (bench_figures) are held to figure_threshold instead.
+    """
+    regressions = []
+    for name, seconds in results.items():
+        if name not in baseline:
+            continue
+        ratio = seconds / baseline[name]
+        limit = figure_threshold if name.startswith('fig') else threshold
+        slower = ratio > limit and seconds - baseline[name] > NOISE_FLOOR
+        flag = ' REGRESSION' if slower else ''
+        print(f'{name:40s} {seconds*1e3:10.3f} ms  {ratio:6.2f}x baseline{flag}')
+        if flag:
+            regressions.append(name)
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--max-size', type=float, default=SIZES[-1],
+                        help='largest energy grid (default: 1e7)')
+    parser.add_argument('--skip-model', action='store_true')
+    parser.add_argument('--skip-figures', action='store_true')
+    parser.add_argument('--figures', type=int, nargs='+')
+    parser.add_argument('-o', '--output', help='write results as JSON')
+    parser.add_argument('--baseline', help='JSON results to compare against')
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help='slowdown ratio reported as a regression (default: 1.2)')
+    parser.add_argument('--figure-threshold', type=float, default=FIGURE_THRESHOLD,
+                        help='the same for figure timings (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    results = {}
+    if not args.skip_model:
+        results.update(bench_model([n for n in SIZES if n <= args.max_size]))
+    if not args.skip_figures:
+        results.update(bench_figures(args.figures))
+
+    report = {'meta': {'python': platform.python_version(),
+                       'numpy': np.__version__,
+                       'machine': platform.machine(),
+                       'processor': platform.processor(),
+                       'date': time.strftime('%Y-%m-%dT%H:%M:%S')},
+              'results': results}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold, args.figure_threshold)
+        print(f'\n{len(regressions)} regression(s) above {args.threshold:.2f}x '
+              f'({args.figure_threshold:.2f}x for figures)')
+        return 1 if regressions else 0
+
+    for name, seconds in results.items():
+        print(f'{name:40s} {seconds*1e3:10.3f} ms')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
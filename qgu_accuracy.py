@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Accuracy of the Precision Modes
+===============================
+Maximum relative error of qgu_delay in each precision mode against the
+mpmath reference, per element, over an energy grid:
+
+    python qgu_accuracy.py                                   # 0.1-100 eV, 2001 points
+    python qgu_accuracy.py --elements Ne --emin 1e-3 --emax 1e4 --num 20001
+    python qgu_accuracy.py --modes float32 -o accuracy.json
+
+The reference evaluates the same formulas on the same float64 inputs and
+constants with MP_DPS digits, so the errors are rounding errors only. Besides
+tau the report gives the error of E_cutoff and the largest absolute error of
+the logarithmic slope d ln(tau)/d ln(E) as fig5 takes it (np.gradient), where
+rounding noise is divided by the log-energy step.
+"""
+
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+
+from qgu_model import (ELEMENTS, MP_DPS, model_cutoff, model_parameters, qgu_delay,
+                       working_precision)
+from qgu_trace import traced
+
+MODES = ('float32', 'float64')  # modes checked against the reference by default
+
+def relative_error(values, reference):
+    """|values / reference - 1| in float64, formed at the reference precision"""
+    with working_precision('mpmath'):
+        error = np.abs(np.asarray(values, dtype=float) / reference - 1)
+    return np.asarray(error, dtype=float)
+
+def log_slope(E, tau):
+    """d ln(tau) / d ln(E) by np.gradient, as in fig5 panel (b)"""
+    return np.gradient(np.log(np.asarray(tau, dtype=float)), np.log(E))
+
+@traced
+def accuracy_report(E, elements=tuple(ELEMENTS), modes=MODES, version='v2.0'):
+    """Errors of qgu_delay(..., precision=mode) against precision='mpmath'
+
+    Returns {element: {mode: {...}}} with max_rel_error (tau), at_energy
+    (eV, where it occurs), E_cutoff_rel_error, max_slope_error and seconds
+    (time for the element's curve in that mode).
+    """
+    E = np.asarray(E, dtype=float)
+    report = {}
+    for elem in elements:
+        Z, Zeff, charge, _ = model_parameters(elem, version)
+        reference = qgu_delay(Z, Zeff, E, version, charge, precision='mpmath')
+        Ec_reference = model_cutoff(Z, Zeff, version, charge, precision='mpmath')
+        slope_reference = log_slope(E, reference)
+        report[elem] = {}
+        for mode in modes:
+            t0 = time.perf_counter()
+            tau = qgu_delay(Z, Zeff, E, version, charge, precision=mode)
+            seconds = time.perf_counter() - t0
+            error = relative_error(tau, reference)
+            Ec = model_cutoff(Z, Zeff, version, charge, precision=mode)
+            report[elem][mode] = {
+                'max_rel_error': float(error.max()),
+                'at_energy': float(E[error.argmax()]),
+                'E_cutoff_rel_error': float(relative_error(Ec, Ec_reference)),
+                'max_slope_error': float(np.abs(log_slope(E, tau) - slope_reference).max()),
+                'seconds': seconds}
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--elements', nargs='+', default=list(ELEMENTS), choices=list(ELEMENTS))
+    parser.add_argument('--modes', nargs='+', default=list(MODES), choices=list(MODES))
+    parser.add_argument('--version', default='v2.0', choices=['v1.0', 'v2.0'])
+    parser.add_argument('--emin', type=float, default=0.1, help='eV (default: 0.1)')
+    parser.add_argument('--emax', type=float, default=100.0, help='eV (default: 100)')
+    parser.add_argument('--num', type=float, default=2001,
+                        help='log-spaced energies (default: 2001)')
+    parser.add_argument('-o', '--output', help='write the report as JSON')
+    args = parser.parse_args(argv)
+
+    E = np.logspace(np.log10(args.emin), np.log10(args.emax), int(args.num))
+    report = accuracy_report(E, args.elements, args.modes, args.version)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'E': [args.emin, args.emax, int(args.num)], 'mp_dps': MP_DPS,
+                       'version': args.version, 'elements': report}, f, indent=2)
+
+    print(f'{"element":8s} {"mode":8s} {"max rel err":>12s} {"at E (eV)":>11s} '
+          f'{"E_cutoff err":>13s} {"slope err":>10s}')
+    for elem, modes in report.items():
+        for mode, r in modes.items():
+            print(f'{elem:8s} {mode:8s} {r["max_rel_error"]:12.2e} {r["at_energy"]:11.4g} '
+                  f'{r["E_cutoff_rel_error"]:13.2e} {r["max_slope_error"]:10.2e}')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
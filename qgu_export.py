@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Streaming Export of Delay Tables
+================================
+Evaluates qgu_delay and coulomb_delay for a set of elements over an energy
+range in fixed-size chunks and writes the columns incrementally, so tables
+far larger than RAM can be produced:
+
+    python qgu_export.py delays.npz --elements He Ne Ar --emin 0.1 --emax 100 --num 1e8
+    python qgu_export.py delays.csv --num 1e5 --spacing linear
+    python qgu_export.py delays/ --num 1e9          # one memory-mappable .npy per column
+
+Elements are any atoms or ions of SPECIES, as labels such as Ne, Na+ or Mg2+.
+Columns are E, tau_qgu_<element> and tau_coulomb_<element>. Each output also
+records the elements and their cutoff energies (E_cutoff_<element> arrays in
+npz, meta.json next to the .npy files, '#' header lines in CSV).
+"""
+
+import argparse
+import json
+import os
+import sys
+import zipfile
+
+import numpy as np
+
+from qgu_model import ELEMENTS, coulomb_delay, model_parameters, parse_species, qgu_delay
+from qgu_trace import traced
+
+CHUNK_SIZE = 2**20  # energies per chunk
+
+def energy_chunk(spacing, emin, emax, num, start, stop):
+    """Energies start:stop of an np.logspace/np.linspace grid of num points"""
+    lo, hi = (np.log10(emin), np.log10(emax)) if spacing == 'log' else (emin, emax)
+    step = (hi - lo) / max(num - 1, 1)
+    y = np.arange(start, stop) * step + lo
+    if stop == num and num > 1:
+        y[-1] = hi
+    return 10.0**y if spacing == 'log' else y
+
+def table_columns(elements, version='v2.0'):
+    """[(name, func(E))] for every column of the table"""
+    columns = [('E', lambda E: E)]
+    for elem in elements:
+        Z, Zeff, charge, _ = model_parameters(elem, version)
+        columns.append((f'tau_qgu_{elem}', lambda E, Z=Z, Zeff=Zeff, charge=charge:
+                        qgu_delay(Z, Zeff, E, version, charge)))
+        screened = model_parameters(elem)[1]  # v2.0's Zeff for either version
+        columns.append((f'tau_coulomb_{elem}', lambda E, Zeff=screened: coulomb_delay(Zeff, E)))
+    return columns
+
+def _cutoffs(elements, version):
+    return {elem: model_parameters(elem, version)[3] for elem in elements}
+
+def _chunks(num, chunk_size):
+    return [(start, min(start + chunk_size, num)) for start in range(0, num, chunk_size)]
+
+@traced
+def export_delay_table(path, elements=tuple(ELEMENTS), emin=0.1, emax=100.0,
+                       num=10**6, spacing='log', version='v2.0', fmt=None,
+                       chunk_size=CHUNK_SIZE):
+    """Write the delay table to path, holding at most chunk_size rows in memory
+
+    fmt is 'npz' (compressed, one entry per column), 'csv', or 'npy' (a
+    directory with one memory-mappable array per column); by default it is
+    taken from the extension of path.
+    """
+    if fmt is None:
+        fmt = {'.npz': 'npz', '.csv': 'csv'}.get(os.path.splitext(path)[1], 'npy')
+    num = int(num)
+    columns = table_columns(elements, version)
+    chunks = _chunks(num, chunk_size)
+    cutoffs = _cutoffs(elements, version)
+
+    def column_chunks(func):
+        for start, stop in chunks:
+            yield np.asarray(func(energy_chunk(spacing, emin, emax, num, start, stop)),
+                             dtype='<f8')
+
+    if fmt == 'npy':
+        os.makedirs(path, exist_ok=True)
+        for name, func in columns:
+            out = np.lib.format.open_memmap(os.path.join(path, f'{name}.npy'),
+                                            mode='w+', dtype='<f8', shape=(num,))
+            for (start, stop), values in zip(chunks, column_chunks(func)):
+                out[start:stop] = values
+            out.flush()
+            del out
+        with open(os.path.join(path, 'meta.json'), 'w') as f:
+            json.dump({'elements': list(elements), 'version': version,
+                       'E_cutoff': cutoffs, 'spacing': spacing, 'emin': emin,
+                       'emax': emax, 'num': num}, f, indent=2)
+    elif fmt == 'npz':
+        header = {'descr': '<f8', 'fortran_order': False, 'shape': (num,)}
+        with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED,
+                             allowZip64=True) as zf:
+            for name, func in columns:
+                with zf.open(f'{name}.npy', 'w', force_zip64=True) as f:
+                    np.lib.format.write_array_header_1_0(f, header)
+                    for values in column_chunks(func):
+                        f.write(values.tobytes())
+            for elem, Ec in cutoffs.items():
+                with zf.open(f'E_cutoff_{elem}.npy', 'w') as f:
+                    np.lib.format.write_array(f, np.array(Ec))
+    elif fmt == 'csv':
+        with open(path, 'w') as f:
+            f.write(f'# version {version}\n')
+            for elem, Ec in cutoffs.items():
+                f.write(f'# E_cutoff_{elem} {Ec!r}\n')
+            f.write(','.join(name for name, _ in columns) + '\n')
+            for start, stop in chunks:
+                E = energy_chunk(spacing, emin, emax, num, start, stop)
+                np.savetxt(f, np.column_stack([func(E) for _, func in columns]),
+                           delimiter=',', fmt='%.17g')
+    else:
+        raise ValueError(f"unknown export format: {fmt!r}")
+    return path
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('path', help='output .npz, .csv or directory for .npy columns')
+    parser.add_argument('--elements', nargs='+', default=list(ELEMENTS),
+                        help='atoms or ions, e.g. Ne Na+ Mg2+ (default: the ELEMENTS atoms)')
+    parser.add_argument('--emin', type=float, default=0.1, help='eV (default: 0.1)')
+    parser.add_argument('--emax', type=float, default=100.0, help='eV (default: 100)')
+    parser.add_argument('--num', type=float, default=1e6, help='energies (default: 1e6)')
+    parser.add_argument('--spacing', choices=['log', 'linear'], default='log')
+    parser.add_argument('--version', choices=['v1.0', 'v2.0'], default='v2.0')
+    parser.add_argument('--format', choices=['npz', 'npy', 'csv'],
+                        help='default: from the extension of path')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    args = parser.parse_args(argv)
+    for label in args.elements:
+        try:
+            parse_species(label)
+        except ValueError as error:
+            parser.error(str(error))
+    export_delay_table(args.path, args.elements, args.emin, args.emax, args.num,
+                       args.spacing, args.version, args.format, args.chunk_size)
+    print(f"✓ Delay table written: {args.path}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,175 @@
+"""
+Hartree-Fock-Slater Effective Charges
+=====================================
+Self-consistent central-field (Hartree-Fock-Slater, X-alpha exchange with the
+Latter tail) solutions for atoms and ions, giving orbital-resolved effective
+charges on the scale of Slater's rules, to use in place of the Slater-rule
+Zeff (SPECIES['Zeff_slater']):
+
+    from qgu_hf import hf_zeff
+    from qgu_model import cutoff_energy
+    Ec = cutoff_energy(10, hf_zeff(10))            # Ne
+    Ec = cutoff_energy(11, hf_zeff(11, 1), charge=1)   # Na+
+
+The tabulated ELEMENTS Zeff are fitted and smaller (Ne 3.85 against 5.36
+here), so these cutoffs compare with those from Zeff_slater, not with the
+tabulated ones.
+
+The radial equation is discretized on a logarithmic grid r = exp(x) / Z,
+where it becomes a symmetric tridiagonal eigenproblem per l; all bound
+orbitals of one l come from a single eigen-solve. Open shells are spherically
+averaged. Converged solutions are cached in memory and, if HF_CACHE_DIR is
+set, on disk keyed by (Z, charge, grid), so repeated runs never re-solve.
+"""
+
+import hashlib
+from functools import lru_cache
+
+import numpy as np
+
+from qgu_model import SUBSHELLS, Z_MAX, _occupations, disk_cached, outermost_subshell
+from qgu_trace import traced
+
+HF_GRID = (2000, -8.0, 60.0)  # (points, ln(Z r_min), r_max in bohr)
+HF_CACHE_DIR = None  # as qgu_model.CURVE_CACHE_DIR, for hfs_solution
+XALPHA = 1.0  # Slater's exchange; 2/3 gives Kohn-Sham (Gaspar) exchange
+# Slater's effective principal quantum numbers n*, indexed by n (n = 7 continues 4.2)
+SLATER_N_STAR = (None, 1.0, 2.0, 3.0, 3.7, 4.0, 4.2, 4.2)
+
+def radial_grid(Z, grid=HF_GRID):
+    """Radial points r (bohr) and the uniform step h in x = ln(Z r)"""
+    n_points, x_min, r_max = grid
+    x = np.linspace(x_min, np.log(Z * r_max), int(n_points))
+    return np.exp(x) / Z, x[1] - x[0]
+
+def thomas_fermi_potential(Z, r):
+    """Tietz's fit to the Thomas-Fermi atomic potential (hartree)"""
+    b = 0.8853 * Z**(-1/3)
+    return -Z / r / (1 + 0.53625 * r / b)**2
+
+def radial_orbitals(V, r, h, l, count):
+    """Lowest `count` eigenpairs of -u''/2 + (l(l+1)/2r^2 + V) u = e u
+
+    With u = sqrt(r) y and x = ln r the equation reads
+    -y'' + (l+1/2)^2 y + 2 r^2 V y = 2 r^2 e y, which second differences turn
+    into a symmetric tridiagonal problem after scaling by r. Inside the first
+    point y is continued as r^(l+1/2), its form near the nucleus. Returns the
+    energies (count,) and radial functions P = u normalized on the grid,
+    shape (count, len(r)).
+    """
+    from scipy.linalg import eigh_tridiagonal
+    diag = (1 / h**2 + (l + 0.5)**2 / 2) / r**2 + V
+    diag[0] -= np.exp(-(l + 0.5) * h) / (2 * h**2 * r[0]**2)
+    off = -1 / (2 * h**2 * r[:-1] * r[1:])
+    # The diagonal spans ~1/(h r_min)^2, so the default tolerance (relative to
+    # the matrix norm) would limit the bound-state energies to ~1e-3
+    energy, z = eigh_tridiagonal(diag, off, select='i', select_range=(0, count - 1),
+                                 tol=1e-14)
+    P = z.T / np.sqrt(r * h)
+    P *= np.sign(P[:, :1])  # positive near the nucleus
+    return energy, P
+
+def hartree_potential(q, r, h):
+    """Electrostatic potential of the radial density q = 4 pi r^2 rho"""
+    def cumtrapz(f):
+        return np.concatenate(([0.0], np.cumsum((f[1:] + f[:-1]) * h / 2)))
+    inner = cumtrapz(q * r)  # charge inside r, since dr = r dx
+    outer = cumtrapz(q)      # integral of q / r' dr'
+    return inner / r + outer[-1] - outer
+
+def _configuration(Z, charge):
+    occ = _occupations(np.array([Z]), np.array([charge]))[0]
+    return [(n, l, int(o)) for (n, l, _), o in zip(SUBSHELLS, occ) if o > 0]
+
+@traced
+def solve_hfs(Z, charge=0, grid=HF_GRID, alpha=XALPHA, mixing=0.3,
+              tol=1e-8, max_iter=300):
+    """Self-consistent Hartree-Fock-Slater solution for one atom or ion
+
+    Occupations follow qgu_model._occupations. Returns a dict of arrays:
+    orbitals (k, 2) as (n, l), occupation, energy (hartree), r_mean, Zeff,
+    Zeff_energy (from e = -Zeff^2/2n^2), r, P (k, len(r)), V, iterations and
+    converged. Zeff follows Slater's orbital convention, the charge of the
+    Slater orbital with the same <r> = n*(2n* + 1) / 2Zeff, so it is on the
+    scale of slater_screening; the hydrogenic <r> with the true n would put
+    n >= 4 shells far above it.
+    """
+    if not (1 <= Z <= Z_MAX and 0 <= charge < Z):
+        raise IndexError("no species with this Z and charge")
+    config = _configuration(Z, charge)
+    n = np.array([c[0] for c in config])
+    l = np.array([c[1] for c in config])
+    occupation = np.array([c[2] for c in config], dtype=float)
+    r, h = radial_grid(Z, grid)
+    tail = -(charge + 1) / r  # Latter correction
+
+    V = np.minimum(thomas_fermi_potential(Z, r), tail)
+    energy = np.zeros(len(config))
+    P = np.zeros((len(config), len(r)))
+    converged = False
+    for iteration in range(1, max_iter + 1):
+        previous = energy.copy()
+        for ll in np.unique(l):
+            rows = np.flatnonzero(l == ll)
+            e, orbitals = radial_orbitals(V, r, h, ll, n[rows].max() - ll)
+            energy[rows] = e[n[rows] - ll - 1]
+            P[rows] = orbitals[n[rows] - ll - 1]
+        q = occupation @ P**2
+        rho = q / (4 * np.pi * r**2)
+        V_out = -Z / r + hartree_potential(q, r, h) \
+            - 1.5 * alpha * np.cbrt(3 * rho / np.pi)
+        V_out = np.minimum(V_out, tail)
+        if np.max(np.abs(energy - previous)) < tol * max(1.0, np.max(np.abs(energy))):
+            converged = True
+            break
+        V = (1 - mixing) * V + mixing * V_out
+
+    r_mean = (P**2 * r**2).sum(axis=1) * h
+    n_star = np.array([SLATER_N_STAR[k] for k in n])
+    return {'orbitals': np.column_stack([n, l]), 'occupation': occupation,
+            'energy': energy, 'r_mean': r_mean,
+            'Zeff': n_star * (2 * n_star + 1) / (2 * r_mean),
+            'Zeff_energy': n * np.sqrt(np.maximum(-2 * energy, 0)),
+            'r': r, 'P': P, 'V': V, 'iterations': np.array(iteration),
+            'converged': np.array(converged)}
+
+@lru_cache(maxsize=None)
+def _solver_digest():
+    import inspect
+    source = ''.join(inspect.getsource(func) for func in
+                     (radial_grid, thomas_fermi_potential, radial_orbitals,
+                      hartree_potential, _configuration, _occupations, solve_hfs)) \
+        + repr(SLATER_N_STAR)
+    return hashlib.sha256(source.encode()).hexdigest()
+
+def hfs_solution(Z, charge=0, grid=HF_GRID, alpha=XALPHA):
+    """solve_hfs(Z, charge, grid, alpha), memoized
+
+    If HF_CACHE_DIR is set, solutions are stored there as .npz files and
+    loaded back on later runs. The returned arrays are read-only.
+    """
+    key = (int(Z), int(charge), tuple(grid), float(alpha), _solver_digest(),
+           HF_CACHE_DIR)
+    return _hfs_solution(key)
+
+@lru_cache(maxsize=256)
+def _hfs_solution(key):
+    Z, charge, grid, alpha, digest, directory = key
+    return disk_cached(directory, key[:-1], lambda: solve_hfs(Z, charge, grid, alpha),
+                       prefix='hfs_', suffix='.npz')
+
+def hf_zeff(Z, charge=0, orbital=None, grid=HF_GRID, alpha=XALPHA):
+    """Effective charge of one orbital, by default the outermost
+
+    orbital is (n, l); the outermost orbital is qgu_model.outermost_subshell,
+    the first one removed on ionization.
+    """
+    solution = hfs_solution(Z, charge, grid, alpha)
+    if orbital is None:
+        occ = _occupations(np.array([Z]), np.array([charge]))[0]
+        orbital = SUBSHELLS[outermost_subshell(occ)][:2]
+    n, l = solution['orbitals'].T
+    rows = np.flatnonzero((n == orbital[0]) & (l == orbital[1]))
+    if not len(rows):
+        raise KeyError(f"orbital {orbital} is not occupied in Z={Z}, charge={charge}")
+    return float(solution['Zeff'][rows[0]])
@@ -0,0 +1,151 @@
+"""
+Table-Backed Delay Lookups
+==========================
+qgu_delay precomputed per element on one log-spaced grid in the reduced
+energy x = E / E_cutoff, for fast repeated evaluation:
+
+    from qgu_lookup import build_delay_table, load_delay_table, table_delay
+    build_delay_table('delay_table', tol=1e-6)       # once
+    table = load_delay_table('delay_table')          # memory-mapped
+    tau = table_delay(table, 'Ne', E)
+
+The curves are stored as log(tau * E_cutoff) against log(x), where they all
+have the same shape (fig2, panel b), and interpolated linearly; since x is
+uniform in log, a lookup is a log, a truncation and two gathers, with no
+search. The grid is refined until the interpolation error, measured on
+REFINE_CHECK points inside every interval against the direct formula, is
+below tol; the achieved bound is stored with the table. Energies outside
+the tabulated x range fall back to qgu_delay.
+
+On disk a table is a directory holding log_tau.npy (elements x points) and
+meta.json, so any number of processes can memory-map it.
+"""
+
+import json
+import math
+import os
+
+import numpy as np
+
+from qgu_model import ELEMENTS, model_digest, model_parameters, qgu_delay
+from qgu_trace import traced
+
+TABLE_X_RANGE = (1e-4, 1e4)  # tabulated E / E_cutoff
+TABLE_TOL = 1e-6             # relative interpolation error
+REFINE_CHECK = 9             # points checked per interval; odd, so the midpoint is one
+
+def _interpolate(log_tau, lx0, h, log_x):
+    """Linear interpolation of log_tau (1-D) on the uniform grid lx0 + h*i
+
+    Returns the interpolated values and the fractional grid position t;
+    t outside [0, n - 1] means log_x was off the grid and clamped. Works in
+    place on fresh temporaries, as the lookup is bound by memory traffic.
+    """
+    t = log_x - lx0
+    t *= 1 / h
+    i = t.astype(np.intp)
+    np.clip(i, 0, len(log_tau) - 2, out=i)
+    lo = log_tau[i]
+    value = log_tau[1:][i]
+    value -= lo
+    value *= t - i
+    value += lo
+    return value, t
+
+def _max_rel_error(Z, Zeff, charge, Ec, version, log_tau, lx0, h):
+    """Largest relative error of the interpolated curve inside any interval"""
+    frac = (np.arange(1, REFINE_CHECK + 1) / (REFINE_CHECK + 1))[:, None]
+    log_x = (lx0 + h * (np.arange(log_tau.size - 1) + frac)).ravel()
+    exact = qgu_delay(Z, Zeff, Ec * np.exp(log_x), version, charge)
+    approx = np.exp(_interpolate(log_tau, lx0, h, log_x)[0]) / Ec
+    return float(np.max(np.abs(approx / exact - 1)))
+
+@traced
+def build_delay_table(path=None, elements=tuple(ELEMENTS), version='v2.0',
+                      tol=TABLE_TOL, x_range=TABLE_X_RANGE, n_points=1025):
+    """Tabulate qgu_delay for elements, doubling the grid until tol is met
+
+    elements are species labels, atoms or ions (see model_parameters).
+    Returns the table as a dict (see load_delay_table); if path is given it
+    is also written there and the returned table is memory-mapped from it.
+    """
+    lx0, lx1 = np.log(x_range[0]), np.log(x_range[1])
+    params = [model_parameters(elem, version) for elem in elements]
+    while True:
+        h = (lx1 - lx0) / (n_points - 1)
+        x = np.exp(lx0 + h * np.arange(n_points))
+        log_tau = np.array([np.log(qgu_delay(Z, Zeff, Ec * x, version, charge) * Ec)
+                            for Z, Zeff, charge, Ec in params])
+        error = max(_max_rel_error(*p, version, row, lx0, h)
+                    for p, row in zip(params, log_tau))
+        if error <= tol:
+            break
+        n_points = 2 * n_points - 1  # keeps the existing points
+    meta = {'elements': list(elements), 'version': version,
+            'Z': [p[0] for p in params], 'Zeff': [p[1] for p in params],
+            'charge': [p[2] for p in params], 'E_cutoff': [p[3] for p in params],
+            'log_x0': lx0, 'log_x_step': h,
+            'n_points': n_points, 'max_rel_error': error, 'tol': tol,
+            'model_digest': model_digest()}
+    if path is None:
+        return _table(log_tau, meta)
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, 'log_tau.npy'), log_tau)
+    with open(os.path.join(path, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+    return load_delay_table(path)
+
+def _table(log_tau, meta):
+    table = dict(meta, log_tau=log_tau,
+                 index={elem: i for i, elem in enumerate(meta['elements'])})
+    # what table_delay needs for one energy, per element, as plain Python objects
+    table['scalar'] = {elem: (row, meta['log_x0'] + math.log(Ec), 1 / meta['log_x_step'],
+                              meta['n_points'] - 1, Ec)
+                       for elem, row, Ec in zip(meta['elements'], log_tau, meta['E_cutoff'])}
+    table['x_range'] = (np.exp(meta['log_x0']),
+                        np.exp(meta['log_x0'] + meta['log_x_step'] * (meta['n_points'] - 1)))
+    return table
+
+def load_delay_table(path):
+    """Table written by build_delay_table, with log_tau memory-mapped
+
+    Raises ValueError if the model has changed since the table was built.
+    """
+    with open(os.path.join(path, 'meta.json')) as f:
+        meta = json.load(f)
+    if meta['model_digest'] != model_digest():
+        raise ValueError(f"delay table {path!r} was built from a different model; rebuild it")
+    log_tau = np.load(os.path.join(path, 'log_tau.npy'), mmap_mode='r')
+    return _table(np.asarray(log_tau), meta)  # plain ndarray view: faster gathers
+
+def table_delay(table, elem, E):
+    """qgu_delay of elem at energies E (eV) from the table, in as
+
+    Agrees with qgu_delay to the table's max_rel_error inside its x_range;
+    energies outside it are evaluated directly. A Python int or float E
+    returns a float, looked up without array temporaries.
+    """
+    if type(E) is float or type(E) is int:
+        log_tau, lx0, inv_h, last, Ec = table['scalar'][elem]
+        t = (math.log(E) - lx0) * inv_h if E > 0 else -1.0
+        if 0 <= t <= last:
+            i = int(t) if t < last else last - 1
+            lo = log_tau.item(i)
+            return math.exp(lo + (log_tau.item(i + 1) - lo) * (t - i)) / Ec
+        row = table['index'][elem]
+        return float(qgu_delay(table['Z'][row], table['Zeff'][row], E, table['version'],
+                               table['charge'][row]))
+    row = table['index'][elem]
+    Ec = table['E_cutoff'][row]
+    E = np.asarray(E, dtype=float)
+    shape = E.shape
+    E = E.reshape(-1)
+    log_tau, t = _interpolate(table['log_tau'][row], table['log_x0'] + np.log(Ec),
+                              table['log_x_step'], np.log(E))
+    log_tau -= np.log(Ec)
+    tau = np.exp(log_tau, out=log_tau)
+    if t.size and (t.min() < 0 or t.max() > table['n_points'] - 1):
+        outside = (t < 0) | (t > table['n_points'] - 1)
+        tau[outside] = qgu_delay(table['Z'][row], table['Zeff'][row], E[outside],
+                                 table['version'], table['charge'][row])
+    return tau.reshape(shape)
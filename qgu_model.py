@@ -0,0 +1,886 @@
+"""
+Quantum-Geometric Delay Model
+=============================
+Physics model behind the publication figures: Coulomb and regularized
+photoionization time delays, cutoff energies with multi-electron corrections,
+and the sweep, uncertainty and fitting tools built on them.
+
+The model evaluates in float64 by default. precision='float32' halves the
+memory traffic of large evaluations (about 1e-7 relative error), and
+precision='mpmath' evaluates the same formulas on the float64 inputs with
+MP_DPS digits as a reference; qgu_accuracy.py compares the modes.
+
+Only NumPy is imported at load time (inspect and the process pool are
+imported where they are needed), so short-lived compute-only workers start
+quickly; the plotting layer lives in 11.py.
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import re
+from functools import lru_cache
+
+import numpy as np
+
+from qgu_trace import traced
+
+# Physical constants
+HARTREE_TO_EV = 27.2114
+AU_TIME_TO_AS = 24.18884326509
+Q0 = 5.369  # C_LIG * K
+ALPHA_FS = 1/137.036
+
+# Floating-point modes; 'mpmath' is the high-precision reference
+PRECISIONS = ('float32', 'float64', 'mpmath')
+MP_DPS = 40  # decimal digits carried in the 'mpmath' mode
+
+# Element data
+ELEMENTS = {
+    'He': {'Z': 2, 'Zeff': 1.70, 'Ncore': 0, 'Ntotal': 2, 'Ip': 24.59},
+    'Ne': {'Z': 10, 'Zeff': 3.85, 'Ncore': 2, 'Ntotal': 10, 'Ip': 21.56},
+    'Ar': {'Z': 18, 'Zeff': 5.05, 'Ncore': 10, 'Ntotal': 18, 'Ip': 15.76},
+    'Kr': {'Z': 36, 'Zeff': 5.35, 'Ncore': 28, 'Ntotal': 36, 'Ip': 14.00},
+    'Xe': {'Z': 54, 'Zeff': 6.35, 'Ncore': 46, 'Ntotal': 54, 'Ip': 12.13}
+}
+
+# Element symbols, SYMBOLS[Z - 1]
+SYMBOLS = '''H He Li Be B C N O F Ne Na Mg Al Si P S Cl Ar K Ca Sc Ti V Cr Mn Fe Co
+Ni Cu Zn Ga Ge As Se Br Kr Rb Sr Y Zr Nb Mo Tc Ru Rh Pd Ag Cd In Sn Sb Te I Xe
+Cs Ba La Ce Pr Nd Pm Sm Eu Gd Tb Dy Ho Er Tm Yb Lu Hf Ta W Re Os Ir Pt Au Hg Tl
+Pb Bi Po At Rn Fr Ra Ac Th Pa U Np Pu Am Cm Bk Cf Es Fm Md No Lr Rf Db Sg Bh Hs
+Mt Ds Rg Cn Nh Fl Mc Lv Ts Og'''.split()
+
+def ion_label(Z, charge=0):
+    """Symbol with superscript charge, e.g. ion_label(12, 2) == 'Mg²⁺'"""
+    charge = int(charge)
+    sup = '' if charge < 2 else str(charge).translate(str.maketrans('0123456789', '⁰¹²³⁴⁵⁶⁷⁸⁹'))
+    return SYMBOLS[int(Z) - 1] + sup + ('⁺' if charge else '')
+
+def parse_species(label):
+    """(Z, charge) of a label such as 'Ne', 'Na+' or 'Mg2+'"""
+    match = re.fullmatch(r'([A-Z][a-z]*)(?:(\d*)\+)?', label)
+    if match is None or match[1] not in SYMBOLS:
+        raise ValueError(f"not a species label: {label!r}")
+    Z = SYMBOLS.index(match[1]) + 1
+    charge = 0 if match[2] is None else int(match[2] or 1)
+    if charge >= Z:
+        raise ValueError(f"{label!r}: the charge must be below Z = {Z}")
+    return Z, charge
+
+def as_precision(x, precision='float64'):
+    """x as an array of the given precision mode
+
+    For 'mpmath' this is an object array of mpmath.mpf holding the float64
+    values exactly, on which the model formulas evaluate unchanged.
+    """
+    if precision == 'mpmath':
+        x = np.asarray(x)
+        if x.dtype != object:
+            import mpmath
+            x = np.frompyfunc(mpmath.mpf, 1, 1)(x.astype(float))
+        return np.asarray(x, dtype=object)
+    if precision not in PRECISIONS:
+        raise ValueError(f"unknown precision {precision!r}, expected one of {PRECISIONS}")
+    return np.asarray(x, dtype=precision)
+
+def working_precision(precision):
+    """Context for evaluating the model in a precision mode"""
+    if precision == 'mpmath':
+        import mpmath
+        return mpmath.workdps(MP_DPS)
+    return contextlib.nullcontext()
+
+@traced
+def coulomb_delay(Z, E):
+    """Coulomb time delay in as
+
+    Z and E broadcast against each other, so ``coulomb_delay(Z[:, None], E)``
+    returns an (elements x energies) array.
+    """
+    return AU_TIME_TO_AS * np.asarray(Z) / (np.asarray(E)**(3/2))
+
+# Subshells in Madelung filling order as (n, l, capacity)
+SUBSHELLS = [(1, 0, 2), (2, 0, 2), (2, 1, 6), (3, 0, 2), (3, 1, 6), (4, 0, 2),
+             (3, 2, 10), (4, 1, 6), (5, 0, 2), (4, 2, 10), (5, 1, 6), (6, 0, 2),
+             (4, 3, 14), (5, 2, 10), (6, 1, 6), (7, 0, 2), (5, 3, 14), (6, 2, 10),
+             (7, 1, 6)]
+SUBSHELL_N, SUBSHELL_L, SUBSHELL_CAPACITY = (np.array(c) for c in zip(*SUBSHELLS))
+Z_MAX = 118
+
+def outermost_subshell(occ):
+    """Index in SUBSHELLS of the outermost occupied subshell, per row of occ
+
+    The outermost subshell is the first one emptied on ionization: highest n,
+    then highest l.
+    """
+    occ = np.asarray(occ)
+    return np.argmax(np.where(occ > 0, SUBSHELL_N * 4 + SUBSHELL_L, -1), axis=-1)
+
+def multi_electron_factor(Ncore, Ntotal, base=0.15, slope=0.30):
+    """Multi-electron coupling correction C_multi"""
+    alpha_multi = base + slope * (Ncore / Ntotal)
+    return 1 / (1 + alpha_multi * Ncore/Ntotal)**2
+
+def relativistic_factor(Zeff):
+    """Relativistic correction C_rel"""
+    return 1 - (ALPHA_FS * Zeff)**2  # 1 / gamma^2
+
+def polarization_factor(Ncore, core=0.5, scale=0.15):
+    """Core polarization correction C_pol"""
+    alpha_pol = 1 + core * (Ncore / 10)
+    return 1 - scale * (alpha_pol / 10)
+
+def species_index(Z, charge=0):
+    """Row of (Z, charge) in SPECIES; rows are ordered by Z, then charge"""
+    Z = np.asarray(Z).astype(np.intp)
+    charge = np.asarray(charge).astype(np.intp)
+    if np.any((Z < 1) | (Z > Z_MAX) | (charge < 0) | (charge >= Z)):
+        raise IndexError("no species with this Z and charge in SPECIES")
+    return Z * (Z - 1) // 2 + charge
+
+def _occupations(Z, charge):
+    """Subshell occupations (species x SUBSHELLS)
+
+    The neutral atom is filled in Madelung order and ionized from the
+    outermost subshell (highest n, then highest l).
+    """
+    n, l, cap = SUBSHELL_N, SUBSHELL_L, SUBSHELL_CAPACITY
+    occ = np.clip(Z[:, None] - (np.cumsum(cap) - cap), 0, cap)
+    order = np.lexsort((-l, -n))
+    occ_out = occ[:, order]
+    removed_before = np.cumsum(occ_out, axis=1) - occ_out
+    occ[:, order] -= np.clip(charge[:, None] - removed_before, 0, occ_out)
+    return occ
+
+def _slater_coefficients():
+    """Screening of an electron in subshell i by one in subshell j (Slater's rules)
+
+    Subshells are grouped as [1s] [2s,2p] [3s,3p] [3d] [4s,4p] [4d] [4f] ...
+    Electrons in the same group screen 0.35 (0.30 within 1s). For an s or p
+    electron, shell n-1 screens 0.85 and shells below 1.00; for a d or f
+    electron, every group to its left screens 1.00. Groups to the right
+    do not screen.
+    """
+    n, l = SUBSHELL_N, SUBSHELL_L
+    group = n * 4 + np.where(l <= 1, 0, l)  # Slater order: ns,np < nd < nf < (n+1)s,p
+    same = group[:, None] == group[None, :]
+    inner = group[None, :] < group[:, None]
+    sp = (l <= 1)[:, None]
+    dn = n[:, None] - n[None, :]
+    coeff = np.where(sp & (dn == 1), 0.85, np.where(inner & (~sp | (dn >= 2)), 1.0, 0.0))
+    return np.where(same, np.where(n[:, None] == 1, 0.30, 0.35), coeff)
+
+def slater_screening(occ):
+    """Slater screening constant sigma of the outermost electron for each row of occ
+
+    The outermost electron is the first one removed on ionization (highest n,
+    then highest l), so Zeff = Z - sigma is the charge seen by it.
+    """
+    outer = outermost_subshell(occ)
+    coeff = _slater_coefficients()[outer]
+    return (coeff * occ).sum(axis=1) - coeff[np.arange(len(outer)), outer]
+
+@traced
+def build_species_table():
+    """Struct-of-arrays table of every species with Z <= Z_MAX
+
+    Ncore counts electrons below the outermost occupied shell. Zeff_slater is
+    Z - sigma from Slater's rules. Zeff is the same except along the
+    isoelectronic sequences of the ELEMENTS atoms: those keep the atom's
+    fitted screening sigma = Z - Zeff, so Na+ has Zeff = 11 - 6.15 like Ne,
+    and every species in a sequence is on one scale. E_cutoff is computed
+    from Zeff with the full correction model.
+    """
+    Z = np.repeat(np.arange(1, Z_MAX + 1), np.arange(1, Z_MAX + 1))
+    charge = np.arange(len(Z)) - Z * (Z - 1) // 2
+    occ = _occupations(Z, charge)
+    n_outer = SUBSHELL_N[outermost_subshell(occ)]
+    Ncore = np.where(SUBSHELL_N < n_outer[:, None], occ, 0).sum(axis=1)
+    Ntotal = Z - charge
+    Zeff_slater = Z - slater_screening(occ)
+    Zeff = Zeff_slater.copy()
+    for data in ELEMENTS.values():
+        sequence = Ntotal == data['Z']
+        Zeff[sequence] = Z[sequence] - (data['Z'] - data['Zeff'])
+        row = species_index(data['Z'])
+        Zeff[row] = data['Zeff']  # exactly, not rounded through sigma
+        Ncore[row] = data['Ncore']
+        Ntotal[row] = data['Ntotal']
+
+    C_multi = multi_electron_factor(Ncore, Ntotal)
+    C_rel = relativistic_factor(Zeff)
+    C_pol = polarization_factor(Ncore)
+    E_cutoff = (Zeff**2 / Q0) * HARTREE_TO_EV * C_multi * C_rel * C_pol
+    return {'Z': Z, 'charge': charge, 'Ncore': Ncore, 'Ntotal': Ntotal,
+            'Zeff_slater': Zeff_slater, 'Zeff': Zeff, 'C_multi': C_multi,
+            'C_rel': C_rel, 'C_pol': C_pol, 'E_cutoff': E_cutoff}
+
+def isoelectronic_grid(table):
+    """Columns of table rearranged as (Z_MAX, Z_MAX) arrays indexed [Z-1, N-1]
+
+    N = Z - charge is the number of electrons; entries with N > Z are NaN.
+    """
+    rows = table['Z'] - 1, table['Z'] - table['charge'] - 1
+    grid = {}
+    for name, column in table.items():
+        grid[name] = np.full((Z_MAX, Z_MAX), np.nan)
+        grid[name][rows] = column
+    return grid
+
+SPECIES = build_species_table()
+SPECIES_GRID = isoelectronic_grid(SPECIES)
+
+def isoelectronic_sequence(N, column='E_cutoff', n_ions=None):
+    """Column of SPECIES along the N-electron sequence, neutral atom first
+
+    Returns a read-only view of SPECIES_GRID (Z = N, N+1, ...), so sequences
+    cost no copy; n_ions truncates it.
+    """
+    if not 1 <= N <= Z_MAX:
+        raise IndexError(f"no {N}-electron sequence in SPECIES")
+    view = SPECIES_GRID[column][N - 1:, N - 1][:n_ions]
+    view.flags.writeable = False
+    return view
+
+@traced
+def cutoff_energy(Z, Zeff, corrections=True, charge=0, precision='float64'):
+    """Calculate cutoff energy in eV (element-wise over array Z, Zeff)
+
+    precision is one of PRECISIONS; float32 cutoffs are computed in float64
+    and rounded once.
+    """
+    if precision == 'float32':
+        return np.float32(cutoff_energy(Z, Zeff, corrections, charge))
+    with working_precision(precision):
+        Zeff = as_precision(Zeff, precision)
+        base = (Zeff**2 / Q0) * HARTREE_TO_EV
+        
+        if not corrections:
+            return base
+        
+        # Multi-electron coupling and polarization depend only on (Z, charge)
+        row = species_index(Z, charge)
+        if precision == 'mpmath':
+            # From the electron counts, not the rounded table entries
+            Ncore = as_precision(SPECIES['Ncore'][row], precision)
+            C_multi = multi_electron_factor(Ncore, as_precision(SPECIES['Ntotal'][row], precision))
+            C_pol = polarization_factor(Ncore)
+        else:
+            C_multi = SPECIES['C_multi'][row]
+            C_pol = SPECIES['C_pol'][row]
+        
+        return base * C_multi * relativistic_factor(Zeff) * C_pol
+
+def model_cutoff(Z, Zeff, version='v2.0', charge=0, precision='float64'):
+    """The cutoff energy qgu_delay uses for version (eV)
+
+    v1.0 scales the bare nuclear charge without corrections; v2.0 is
+    cutoff_energy with the full correction model.
+    """
+    if version == 'v1.0':
+        return cutoff_energy(Z, Z, corrections=False, precision=precision)
+    return cutoff_energy(Z, Zeff, corrections=True, charge=charge, precision=precision)
+
+def model_parameters(species, version='v2.0'):
+    """(Z, Zeff, charge, E_cutoff) of a species label as evaluated by version
+
+    species is any atom or ion in SPECIES, e.g. 'Ne' or 'Na+' (see
+    parse_species). v1.0 used the nuclear charge as Zeff (fig1), v2.0 the
+    SPECIES Zeff, which for the ELEMENTS atoms is their tabulated one.
+    """
+    Z, charge = parse_species(species)
+    Zeff = Z if version == 'v1.0' else float(SPECIES['Zeff'][species_index(Z, charge)])
+    return Z, Zeff, charge, float(model_cutoff(Z, Zeff, version, charge))
+
+@traced
+def qgu_delay(Z, Zeff, E, version='v2.0', charge=0, precision='float64'):
+    """Quantum-geometric regularized delay
+
+    Z, Zeff and E broadcast like NumPy arrays. The cutoff is evaluated once on
+    the element parameters before broadcasting against the energy grid, e.g.
+    ``qgu_delay(Z[:, None], Zeff[:, None], E_range)`` for all elements at once.
+    version='numerical' integrates the continuum in the cut-off potential
+    instead (qgu_scattering.numerical_delay, one element at a time); its
+    delays are not on the v1.0/v2.0 scale, see the qgu_scattering docstring.
+
+    precision is one of PRECISIONS: the result is float32, float64 or an
+    object array of mpmath.mpf.
+    """
+    if version == 'numerical':
+        from qgu_scattering import numerical_delay
+        if np.ndim(Z) or np.ndim(Zeff) or np.ndim(charge):
+            raise ValueError("version='numerical' takes one element at a time")
+        if precision != 'float64':
+            raise ValueError("version='numerical' is evaluated in float64 only")
+        return numerical_delay(Z, Zeff, np.asarray(E), charge=charge)
+    with working_precision(precision):
+        Ec = model_cutoff(Z, Zeff, version, charge, precision)
+        return regularized_delay(as_precision(Zeff, precision), Ec,
+                                 as_precision(E, precision))
+
+@traced
+def regularized_delay(Zeff, Ec, E, crossover=0.7, exponent=4, plateau=1.7):
+    """Blend of the plateau delay below Ec and the Coulomb delay above it"""
+    # Phenomenological interpolation
+    x = E / Ec
+    tau_coulomb = coulomb_delay(Zeff, E)
+    tau_plateau = AU_TIME_TO_AS / Ec * plateau
+    
+    # Smooth crossover, weight 1 / (1 + u) on the plateau. A quotient of
+    # positive terms: forming 1 - weight would cancel below Ec, where the
+    # Coulomb delay exceeds the plateau by orders of magnitude
+    u = (x/crossover)**exponent
+    return (tau_plateau + u * tau_coulomb) / (1 + u)
+
+# ==============================================================================
+# ADAPTIVE ENERGY GRIDS
+# ==============================================================================
+@traced
+def adaptive_grid(func, E_min, E_max, tol=1e-3, log=True, seeds=(), n_init=17,
+                  max_points=100_000):
+    """Energy grid on which linear interpolation of func is accurate to tol
+
+    Starting from n_init evenly spaced points plus any seeds, each round
+    evaluates func at every interval midpoint and splits the intervals whose
+    interpolation error exceeds tol, so points gather where the curve bends.
+    With log=True both axes are logarithmic (interpolation in ln E, ln f), which
+    bounds the relative error and refines where d ln f / d ln E changes
+    fastest; otherwise the relative error of linear interpolation is used.
+    func maps an energy array to values of shape (..., len(E)); all curves
+    must meet the tolerance.
+    """
+    to_x, from_x = (np.log, np.exp) if log else (np.asarray, np.asarray)
+    to_y = np.log if log else np.asarray
+    lo, hi = to_x(E_min), to_x(E_max)
+    seeds = to_x(np.asarray(seeds, dtype=float))
+    x = np.union1d(np.linspace(lo, hi, n_init), seeds[(seeds > lo) & (seeds < hi)])
+    y = to_y(func(from_x(x)))
+    
+    while len(x) < max_points:
+        xm = 0.5 * (x[:-1] + x[1:])
+        ym = to_y(func(from_x(xm)))
+        err = np.abs(ym - 0.5 * (y[..., :-1] + y[..., 1:]))
+        if not log:
+            err = err / np.abs(ym)
+        err = err.reshape(-1, len(xm)).max(axis=0)
+        split = np.flatnonzero(err > tol)
+        if not len(split):
+            break
+        if len(x) + len(split) > max_points:
+            split = np.sort(split[np.argsort(err[split])[::-1][:max_points - len(x)]])
+        order = np.argsort(np.concatenate([x, xm[split]]), kind='stable')
+        x = np.concatenate([x, xm[split]])[order]
+        y = np.concatenate([y, ym[..., split]], axis=-1)[..., order]
+    
+    E = from_x(x)
+    E[0], E[-1] = E_min, E_max
+    return E
+
+def adaptive_energy_grid(E_min, E_max, tol, curves, log=True):
+    """Shared adaptive grid for qgu_delay curves given as (Z, Zeff, version)
+
+    The grid is seeded at 0.5, 1 and 2 times each curve's cutoff energy.
+    """
+    def delays(E):
+        return np.stack([qgu_delay(Z, Zeff, E, version) for Z, Zeff, version in curves])
+    Ec = [model_cutoff(Z, Zeff, version) for Z, Zeff, version in curves]
+    seeds = np.outer(Ec, [0.5, 1, 2]).ravel()
+    return adaptive_grid(delays, E_min, E_max, tol, log=log, seeds=seeds)
+
+def grid_spec(kind, start, stop, num, tol=None, curves=()):
+    """Grid spec for energy_grid: fixed ('logspace'/'linspace') or, if tol is
+    given, adaptive to the listed (Z, Zeff, version) curves"""
+    if tol is None:
+        return (kind, start, stop, num)
+    adaptive = {'logspace': 'adaptive_log', 'linspace': 'adaptive_linear'}[kind]
+    return (adaptive, start, stop, tol, tuple(curves))
+
+# ==============================================================================
+# CURVE CACHE
+# ==============================================================================
+CURVE_CACHE_DIR = None  # directory for persisted curves; None keeps them in memory only
+
+def disk_cached(directory, key, compute, prefix='', suffix='.npy'):
+    """compute(), stored in directory under a hash of key and read back later
+
+    suffix '.npy' holds one array, memory-mapped when read back; '.npz' holds
+    a dict of arrays. Files are written to a per-process temporary and
+    renamed into place, so concurrent writers never expose a partial one.
+    directory None computes every time. The result is read-only.
+    """
+    path = None
+    if directory is not None:
+        name = hashlib.sha256(repr(key).encode()).hexdigest()[:32]
+        path = os.path.join(directory, f'{prefix}{name}{suffix}')
+    if path is not None and os.path.exists(path):
+        if suffix != '.npz':
+            return np.load(path, mmap_mode='r')
+        with np.load(path) as data:
+            result = dict(data)
+    else:
+        result = compute()
+        if path is not None:
+            os.makedirs(directory, exist_ok=True)
+            tmp = f'{path}.{os.getpid()}.tmp'
+            with open(tmp, 'wb') as f:
+                if suffix == '.npz':
+                    np.savez(f, **result)
+                else:
+                    np.save(f, result)
+            os.replace(tmp, path)
+    for array in (result.values() if suffix == '.npz' else (result,)):
+        array.flags.writeable = False
+    return result
+
+def model_digest():
+    """Hash of the model constants, element data and model source code"""
+    constants = {'HARTREE_TO_EV': HARTREE_TO_EV, 'AU_TIME_TO_AS': AU_TIME_TO_AS,
+                 'Q0': Q0, 'ALPHA_FS': ALPHA_FS, 'ELEMENTS': ELEMENTS,
+                 'SYMBOLS': SYMBOLS, 'SUBSHELLS': SUBSHELLS, 'Z_MAX': Z_MAX}
+    h = hashlib.sha256(json.dumps(constants, sort_keys=True).encode())
+    h.update(_model_source().encode())
+    return h.hexdigest()
+
+@lru_cache(maxsize=None)
+def _model_source():
+    import inspect
+    import qgu_scattering
+    return ''.join(inspect.getsource(func) for func in _MODEL_FUNCTIONS) \
+        + inspect.getsource(qgu_scattering)
+
+@traced
+def energy_grid(spec):
+    """Energy array for a grid spec such as ('logspace', -1, 2, 150)
+
+    Adaptive specs from grid_spec take the same bounds as their fixed
+    counterparts (decades for 'adaptive_log', eV for 'adaptive_linear').
+    """
+    kind, *args = spec
+    if kind == 'adaptive_log':
+        start, stop, tol, curves = args
+        return adaptive_energy_grid(10.0**start, 10.0**stop, tol, curves)
+    if kind == 'adaptive_linear':
+        start, stop, tol, curves = args
+        return adaptive_energy_grid(start, stop, tol, curves, log=False)
+    return {'logspace': np.logspace, 'linspace': np.linspace}[kind](*args)
+
+_MODEL_FUNCTIONS = (as_precision, ion_label, parse_species, coulomb_delay, multi_electron_factor,
+                    relativistic_factor, polarization_factor, species_index,
+                    outermost_subshell, _occupations, _slater_coefficients, slater_screening,
+                    build_species_table, isoelectronic_grid, isoelectronic_sequence,
+                    cutoff_energy, model_cutoff, model_parameters, qgu_delay,
+                    regularized_delay,
+                    adaptive_grid, adaptive_energy_grid, energy_grid)
+
+@traced
+def delay_curve(Z, Zeff, grid, version='v2.0', charge=0):
+    """qgu_delay on energy_grid(grid), memoized
+
+    Curves are kept in an in-memory LRU cache keyed by element parameters,
+    model version, grid spec and model digest. If CURVE_CACHE_DIR is set they
+    are also stored there (see disk_cached) and memory-mapped back on later runs.
+    The returned array is read-only. Only the model versions v1.0 and v2.0
+    are cached; version='numerical' is on another scale and raises.
+    """
+    if version not in ('v1.0', 'v2.0'):
+        raise ValueError(f"delay_curve caches the v1.0/v2.0 model, not {version!r}; "
+                         "call qgu_delay directly")
+    key = (float(Z), float(Zeff), int(charge), version, tuple(grid),
+           model_digest(), CURVE_CACHE_DIR)
+    return _delay_curve(key)
+
+@lru_cache(maxsize=256)
+def _delay_curve(key):
+    Z, Zeff, charge, version, grid, digest, directory = key
+    return disk_cached(directory, key[:-1],
+                       lambda: qgu_delay(Z, Zeff, energy_grid(grid), version, charge=charge))
+
+# ==============================================================================
+# PARAMETER SWEEPS
+# ==============================================================================
+# Correction and crossover coefficients with their default values
+SWEEP_DEFAULTS = {'multi_base': 0.15, 'multi_slope': 0.30, 'pol_core': 0.5,
+                  'pol_scale': 0.15, 'crossover': 0.7, 'exponent': 4,
+                  'plateau': 1.7}
+SWEEP_PARAMETERS = ('Q0', 'Zeff') + tuple(SWEEP_DEFAULTS)
+SWEEP_METHODS = ('cartesian', 'lhs')
+
+@traced
+def evaluate_samples(Z, E, samples, charge=0, precision='float64'):
+    """E_cutoff (n,) and tau (n, len(E)) for n samples of the model parameters
+
+    samples maps names from SWEEP_PARAMETERS to length-n arrays. Parameters
+    left out keep their defaults: Q0, the tabulated Zeff and SWEEP_DEFAULTS.
+    Everything is evaluated in the given mode from PRECISIONS.
+    """
+    unknown = set(samples) - set(SWEEP_PARAMETERS)
+    if unknown:
+        raise ValueError(f"unknown sweep parameters: {sorted(unknown)}")
+    row = species_index(Z, charge)
+    Ncore = as_precision(SPECIES['Ncore'][row], precision)
+    Ntotal = as_precision(SPECIES['Ntotal'][row], precision)
+    p = dict(SWEEP_DEFAULTS, Q0=Q0, Zeff=SPECIES['Zeff'][row])
+    p.update(samples)
+    p = {k: as_precision(v, precision)[..., None] for k, v in p.items()}
+    n = max(len(v) for v in p.values())
+    
+    with working_precision(precision):
+        C_multi = multi_electron_factor(Ncore, Ntotal, p['multi_base'], p['multi_slope'])
+        C_pol = polarization_factor(Ncore, p['pol_core'], p['pol_scale'])
+        Ec = (p['Zeff']**2 / p['Q0']) * HARTREE_TO_EV * C_multi * relativistic_factor(p['Zeff']) * C_pol
+        tau = regularized_delay(p['Zeff'], Ec, as_precision(E, precision),
+                                p['crossover'], p['exponent'], p['plateau'])
+    return (np.broadcast_to(Ec, (n, 1))[:, 0],
+            np.broadcast_to(tau, (n, np.size(E))))
+
+def _write_samples(params, ranges, names, method, seed, chunk_size):
+    """Fill the (n, len(names)) params array with sweep samples"""
+    n = len(params)
+    if method == 'cartesian':
+        values = [np.asarray(ranges[name], dtype=float) for name in names]
+        shape = [len(v) for v in values]
+        for start in range(0, n, chunk_size):
+            stop = min(start + chunk_size, n)
+            idx = np.unravel_index(np.arange(start, stop), shape)
+            params[start:stop] = np.column_stack([v[i] for v, i in zip(values, idx)])
+    else:  # 'lhs'
+        rng = np.random.default_rng(seed)
+        for j, name in enumerate(names):
+            low, high = ranges[name]
+            strata = (rng.permutation(n) + rng.random(n)) / n
+            params[:, j] = low + (high - low) * strata
+
+def _open_sweep(out, mode):
+    with open(os.path.join(out, 'sweep.json')) as f:
+        meta = json.load(f)
+    arrays = {k: np.load(os.path.join(out, f'{k}.npy'), mmap_mode=mode)
+              for k in ('params', 'E', 'E_cutoff', 'tau')}
+    return meta, arrays
+
+def _evaluate_chunk(arrays, names, Z, charge, start, stop):
+    samples = dict(zip(names, arrays['params'][start:stop].T))
+    Ec, tau = evaluate_samples(Z, arrays['E'], samples, charge,
+                               arrays['tau'].dtype.name)
+    arrays['E_cutoff'][start:stop] = Ec
+    arrays['tau'][start:stop] = tau
+
+def _sweep_worker(out, start, stop):
+    """Pool task: evaluate one chunk of a sweep stored in out"""
+    meta, arrays = _open_sweep(out, 'r+')
+    _evaluate_chunk(arrays, meta['names'], meta['Z'], meta['charge'], start, stop)
+    for key in ('E_cutoff', 'tau'):
+        arrays[key].flush()
+
+@traced
+def parameter_sweep(Z, E, ranges, method='cartesian', n_samples=None, charge=0,
+                    out=None, chunk_size=None, workers=1, seed=None,
+                    precision='float64'):
+    """Evaluate E_cutoff and tau(E) over a grid of model parameters
+
+    ranges maps names from SWEEP_PARAMETERS to arrays of values, whose outer
+    product is swept (method='cartesian'), or to (low, high) bounds sampled by
+    an n_samples-point Latin hypercube (method='lhs').
+
+    The samples are evaluated in vectorized chunks of chunk_size rows
+    (default: about 1e6 values of tau per chunk). If out is a directory the
+    results are streamed into out/{params,E,E_cutoff,tau}.npy as each chunk
+    finishes and returned memory-mapped, so sweeps larger than RAM are
+    possible; workers > 1 then spreads the chunks over a process pool.
+    Otherwise everything is held in memory. precision='float32' evaluates
+    and stores E_cutoff and tau in float32, halving their size.
+
+    Returns a dict with 'names', 'params' (n, d), 'E', 'E_cutoff' (n,) and
+    'tau' (n, len(E)).
+    """
+    # Checked before any array or file is created
+    if precision not in ('float32', 'float64'):
+        raise ValueError("sweeps are evaluated in float32 or float64")
+    if method not in SWEEP_METHODS:
+        raise ValueError(f"unknown sweep method {method!r}, expected one of {SWEEP_METHODS}")
+    if method == 'lhs' and n_samples is None:
+        raise ValueError("method='lhs' needs n_samples")
+    unknown = set(ranges) - set(SWEEP_PARAMETERS)
+    if unknown:
+        raise ValueError(f"unknown sweep parameters: {sorted(unknown)}")
+    if workers > 1 and out is None:
+        raise ValueError("a parallel sweep needs an output directory")
+    names = list(ranges)
+    E = np.asarray(E, dtype=float)
+    if method == 'cartesian':
+        n = int(np.prod([len(ranges[name]) for name in names]))
+    else:
+        n = int(n_samples)
+    chunk_size = chunk_size or max(1, 2**20 // max(E.size, 1))
+    
+    shapes = {'params': (n, len(names)), 'E': E.shape, 'E_cutoff': (n,),
+              'tau': (n, E.size)}
+    dtypes = {'params': float, 'E': float, 'E_cutoff': precision, 'tau': precision}
+    if out is None:
+        arrays = {k: np.empty(shape, dtypes[k]) for k, shape in shapes.items()}
+    else:
+        os.makedirs(out, exist_ok=True)
+        arrays = {k: np.lib.format.open_memmap(os.path.join(out, f'{k}.npy'),
+                                               mode='w+', dtype=dtypes[k], shape=shape)
+                  for k, shape in shapes.items()}
+        with open(os.path.join(out, 'sweep.json'), 'w') as f:
+            json.dump({'Z': int(Z), 'charge': int(charge), 'names': names,
+                       'method': method, 'n': n}, f, indent=2)
+    arrays['E'][:] = E
+    _write_samples(arrays['params'], ranges, names, method, seed, chunk_size)
+    
+    chunks = [(start, min(start + chunk_size, n)) for start in range(0, n, chunk_size)]
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        for array in arrays.values():
+            array.flush()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(_sweep_worker, [out] * len(chunks), *zip(*chunks)))
+        _, arrays = _open_sweep(out, 'r')
+    else:
+        for start, stop in chunks:
+            _evaluate_chunk(arrays, names, Z, charge, start, stop)
+        if out is not None:
+            for array in arrays.values():
+                array.flush()
+    return dict(arrays, names=names)
+
+# ==============================================================================
+# UNCERTAINTY PROPAGATION
+# ==============================================================================
+HISTOGRAM_BINS = 4096  # log(tau) bins per energy for streaming percentiles
+
+def _standard_normal(n, d, seed_seq, method):
+    """(n, d) standard normal draws, pseudo-random or scrambled Sobol"""
+    rng = np.random.default_rng(seed_seq)
+    if method == 'mc':
+        return rng.standard_normal((n, d))
+    if method == 'qmc':
+        from scipy.special import ndtri
+        from scipy.stats import qmc
+        return ndtri(qmc.Sobol(d, scramble=True, seed=rng).random(n))
+    raise ValueError(f"unknown sampling method: {method!r}")
+
+def _mc_batch(Z, E, charge, nominal, sigma, n, seed_seq, method):
+    """Evaluate one batch of perturbed parameter samples"""
+    z = _standard_normal(n, len(sigma), seed_seq, method)
+    samples = {name: nominal[name] + s * z[:, j]
+               for j, (name, s) in enumerate(sigma.items())}
+    return evaluate_samples(Z, E, samples, charge)
+
+def _mc_histogram_batch(Z, E, charge, nominal, sigma, n, seed_seq, method, lo, width):
+    """Pool task: E_cutoff samples and per-energy log(tau) histogram of a batch"""
+    Ec, tau = _mc_batch(Z, E, charge, nominal, sigma, n, seed_seq, method)
+    return Ec, _log_histogram(tau, lo, width)
+
+def _log_histogram(tau, lo, width):
+    """Counts (energies x HISTOGRAM_BINS + 2) with under- and overflow bins"""
+    m = tau.shape[1]
+    b = np.log(tau)
+    b -= lo
+    b /= width
+    np.fmax(b, -1, out=b)  # NaN lands in the underflow bin
+    np.minimum(b, HISTOGRAM_BINS, out=b)
+    b += 1
+    flat = b.astype(np.intp)
+    flat += np.arange(m) * (HISTOGRAM_BINS + 2)
+    return np.bincount(flat.ravel(), minlength=m * (HISTOGRAM_BINS + 2)).reshape(m, -1)
+
+def _histogram_percentiles(counts, lo, width, q):
+    """Percentiles q (k,) of each energy's histogram, shape (k, energies)"""
+    cdf = np.cumsum(counts, axis=1)
+    target = np.asarray(q)[:, None] / 100 * cdf[:, -1]
+    b = (cdf[None, :, :] < target[..., None]).sum(axis=-1)
+    b = np.minimum(b, HISTOGRAM_BINS + 1)
+    rows = np.arange(counts.shape[0])
+    below = np.where(b > 0, cdf[rows, np.maximum(b - 1, 0)], 0)
+    frac = (target - below) / np.maximum(counts[rows, b], 1)
+    pos = np.clip(b - 1 + frac, 0, HISTOGRAM_BINS)
+    return np.exp(lo + width * pos)
+
+@traced
+def propagate_uncertainty(Z, E, sigma, n_samples=100_000, charge=0,
+                          percentiles=(2.5, 50, 97.5), method='mc', seed=None,
+                          batch_size=2**14, rtol=None, workers=1):
+    """Monte Carlo percentile bands of E_cutoff and tau(E) for one species
+
+    sigma maps names from SWEEP_PARAMETERS (e.g. 'Zeff', 'Q0') to standard
+    deviations of Gaussian errors around the nominal values. Samples are drawn
+    in batches of batch_size, each with its own SeedSequence stream spawned
+    from seed, so results do not depend on the number of workers. method='qmc'
+    uses scrambled Sobol points (keep batch_size a power of two).
+
+    tau percentiles come from per-energy log(tau) histograms whose range is
+    fixed by the first batch, so memory does not grow with n_samples. If rtol
+    is given, sampling stops early once no band moves by more than rtol
+    (relative) between rounds of `workers` batches.
+
+    Returns a dict with 'percentiles', 'E', 'tau' (k, len(E)), 'E_cutoff' (k,),
+    'n_samples' and 'converged'. Ip does not enter the model, so it has no
+    sigma.
+    """
+    E = np.asarray(E, dtype=float)
+    row = species_index(Z, charge)
+    nominal = dict(SWEEP_DEFAULTS, Q0=Q0, Zeff=SPECIES['Zeff'][row])
+    sizes = [min(batch_size, n_samples - start) for start in range(0, n_samples, batch_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    
+    # The first batch fixes the histogram range, padded on both sides
+    Ec, tau = _mc_batch(Z, E, charge, nominal, sigma, sizes[0], seeds[0], method)
+    log_tau = np.log(tau)
+    span = np.maximum(log_tau.max(axis=0) - log_tau.min(axis=0), 1e-6)
+    lo = log_tau.min(axis=0) - 0.5 * span
+    width = 2 * span / HISTOGRAM_BINS
+    counts = _log_histogram(tau, lo, width)
+    Ec_samples = [Ec]
+    
+    def bands():
+        return (_histogram_percentiles(counts, lo, width, percentiles),
+                np.percentile(np.concatenate(Ec_samples), percentiles))
+    
+    tau_q, Ec_q = bands()
+    converged = False
+    pool = None
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        done = 1
+        while done < len(sizes) and not converged:
+            batch = range(done, min(done + max(workers, 1), len(sizes)))
+            args = [(Z, E, charge, nominal, sigma, sizes[i], seeds[i], method, lo, width)
+                    for i in batch]
+            results = (pool.map(_mc_histogram_batch, *zip(*args)) if pool
+                       else (_mc_histogram_batch(*a) for a in args))
+            for Ec, c in results:
+                Ec_samples.append(Ec)
+                counts += c
+            done = batch.stop
+            
+            if rtol is not None:
+                new_tau_q, new_Ec_q = bands()
+                change = max(np.max(np.abs(new_tau_q / tau_q - 1)),
+                             np.max(np.abs(new_Ec_q / Ec_q - 1)))
+                converged = change < rtol
+                tau_q, Ec_q = new_tau_q, new_Ec_q
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    
+    tau_q, Ec_q = bands()
+    return {'percentiles': np.asarray(percentiles), 'E': E, 'tau': tau_q,
+            'E_cutoff': Ec_q, 'n_samples': sum(sizes[:done]),
+            'converged': converged}
+
+# ==============================================================================
+# FITTING
+# ==============================================================================
+FIT_PARAMETERS = ('Zeff', 'E_cutoff', 'plateau', 'crossover')
+
+def delay_jacobian(E, Zeff, Ec, plateau=1.7, crossover=0.7, exponent=4):
+    """regularized_delay and its analytic derivatives
+
+    Returns tau and an array with a trailing axis of length 4 holding
+    d tau / d (Zeff, E_cutoff, plateau, crossover).
+    """
+    tau = regularized_delay(Zeff, Ec, E, crossover, exponent, plateau)
+    tau_coulomb = coulomb_delay(Zeff, E)
+    tau_plateau = AU_TIME_TO_AS / Ec * plateau
+    u = (E / (crossover * Ec))**exponent
+    weight = 1 / (1 + u)
+    # d tau / d ln(u), shared by the E_cutoff and crossover derivatives
+    d_log_u = -(tau_plateau - tau_coulomb) * weight**2 * u
+    J = np.stack(np.broadcast_arrays(
+        u * weight * tau_coulomb / Zeff,  # the Coulomb weight as regularized_delay forms it
+        -weight * tau_plateau / Ec - exponent * d_log_u / Ec,
+        weight * AU_TIME_TO_AS / Ec,
+        -exponent * d_log_u / crossover), axis=-1)
+    return tau, J
+
+def _initial_guess(E, tau):
+    """Starting point per dataset: Zeff from the Coulomb tail, E_cutoff from
+    the plateau, default plateau factor and crossover"""
+    order = np.argsort(E, axis=1)
+    E_sorted = np.take_along_axis(E, order, axis=1)
+    tau_sorted = np.take_along_axis(tau, order, axis=1)
+    tail = slice(-max(1, E.shape[1] // 4), None)
+    Zeff = np.median(tau_sorted[:, tail] * E_sorted[:, tail]**1.5, axis=1) / AU_TIME_TO_AS
+    Ec = SWEEP_DEFAULTS['plateau'] * AU_TIME_TO_AS / tau_sorted[:, 0]
+    return np.column_stack([Zeff, Ec, np.full(len(E), SWEEP_DEFAULTS['plateau']),
+                            np.full(len(E), SWEEP_DEFAULTS['crossover'])])
+
+@traced
+def fit_delay(E, tau, sigma=None, p0=None, free=('Zeff', 'E_cutoff', 'plateau'),
+              exponent=4, max_iter=200, tol=1e-10):
+    """Fit regularized_delay to measured delays by Levenberg-Marquardt
+
+    E, tau and sigma broadcast to (datasets, points); every dataset is fitted
+    simultaneously with batched linear algebra. Parameters are fitted in log
+    space so they stay positive. p0 optionally maps names from FIT_PARAMETERS
+    to starting values (scalars or one per dataset); free lists the fitted
+    parameters. E_cutoff, plateau and crossover are only identifiable as the
+    combinations plateau/E_cutoff and crossover*E_cutoff, so by default the
+    crossover width is held fixed.
+
+    Returns a dict with 'params' (datasets, 4) in FIT_PARAMETERS order, 'cov'
+    (datasets, 4, 4; zero rows for fixed parameters), 'chi2', 'dof' and
+    'converged'. A 1-D input gives unbatched results.
+    """
+    single = np.ndim(tau) == 1
+    E, tau = np.broadcast_arrays(np.atleast_2d(np.asarray(E, dtype=float)),
+                                 np.atleast_2d(np.asarray(tau, dtype=float)))
+    sigma = np.broadcast_to(1.0 if sigma is None else np.atleast_2d(sigma), tau.shape)
+    theta = _initial_guess(E, tau)
+    for name, value in (p0 or {}).items():
+        theta[:, FIT_PARAMETERS.index(name)] = value
+    idx = [FIT_PARAMETERS.index(name) for name in free]
+    
+    def evaluate(theta):
+        model, J = delay_jacobian(E, *theta.T[..., None], exponent=exponent)
+        r = (model - tau) / sigma
+        # Jacobian with respect to the log of each free parameter
+        J = J[..., idx] * theta[:, None, idx] / sigma[..., None]
+        return r, J, np.einsum('bm,bm->b', r, r)
+    
+    r, J, chi2 = evaluate(theta)
+    lam = np.full(len(tau), 1e-3)
+    converged = np.zeros(len(tau), dtype=bool)
+    for _ in range(max_iter):
+        A = np.einsum('bmi,bmj->bij', J, J)
+        g = np.einsum('bmi,bm->bi', J, r)
+        diag = np.einsum('bii->bi', A)
+        damped = A + (lam[:, None] * np.maximum(diag, 1e-30))[..., None] * np.eye(len(idx))
+        step = -np.linalg.solve(damped, g[..., None])[..., 0]
+        
+        trial = theta.copy()
+        trial[:, idx] *= np.exp(np.where(converged[:, None], 0, step))
+        r_t, J_t, chi2_t = evaluate(trial)
+        better = (chi2_t < chi2) & ~converged
+        
+        small = (np.abs(step).max(axis=1) < tol) | (better & (chi2 - chi2_t <= tol * chi2))
+        converged |= small
+        theta = np.where(better[:, None], trial, theta)
+        r = np.where(better[:, None], r_t, r)
+        J = np.where(better[:, None, None], J_t, J)
+        chi2 = np.where(better, chi2_t, chi2)
+        lam = np.where(better, lam / 10, lam * 10)
+        if converged.all():
+            break
+    
+    cov_log = np.linalg.pinv(np.einsum('bmi,bmj->bij', J, J))
+    cov = np.zeros((len(tau), 4, 4))
+    scale = theta[:, idx]
+    cov[:, np.array(idx)[:, None], np.array(idx)] = cov_log * scale[:, :, None] * scale[:, None, :]
+    result = {'params': theta, 'cov': cov, 'chi2': chi2,
+              'dof': tau.shape[1] - len(idx), 'converged': converged}
+    if single:
+        result.update({k: result[k][0] for k in ('params', 'cov', 'chi2', 'converged')})
+    return result
+
+def bootstrap_fit(E, tau, sigma=None, n_boot=1000, seed=None, **kwargs):
+    """Batch fit of n_boot pairs-bootstrap resamples of one dataset"""
+    E, tau = np.broadcast_arrays(np.asarray(E, dtype=float), np.asarray(tau, dtype=float))
+    sigma = np.broadcast_to(1.0 if sigma is None else sigma, tau.shape)
+    rows = np.random.default_rng(seed).integers(0, len(tau), size=(n_boot, len(tau)))
+    return fit_delay(E[rows], tau[rows], sigma[rows], **kwargs)
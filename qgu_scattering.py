@@ -0,0 +1,223 @@
+"""
+Wigner-Smith Delays from Phase Shifts
+=====================================
+Scattering-phase time delays tau_l = d(sigma_l + delta_l)/dE for partial
+waves l in the field of a charge Zeff, to set beside the phenomenological
+qgu_delay:
+
+    import numpy as np
+    from qgu_scattering import wigner_smith_delay
+    E = np.logspace(-1, 2, 10**6)                          # eV
+    tau = wigner_smith_delay(3.85, E, l=np.arange(4)[:, None])   # (4, 10**6) as
+
+sigma_l = arg Gamma(l + 1 + i eta) is the Coulomb phase with
+eta = -Zeff / k (complex log-gamma); its energy derivative is analytic,
+Re psi(l + 1 + i eta) * Zeff / k^3. The complex digamma is evaluated once
+per energy at l = 0 and raised to higher l with the recurrence
+Re psi(j + 1 + i eta) = Re psi(j + i eta) + j / (j^2 + eta^2). Short-range phases
+delta_l(E) are passed as a function and differentiated numerically.
+Energies are in eV and delays in as throughout; l, Zeff and E broadcast.
+
+These delays are computed in consistent atomic units (E converted to
+hartree), whereas qgu_delay's v1.0/v2.0 evaluate Z / E^(3/2) with E in eV
+and regularize it below E_cutoff. The two are therefore on different
+scales, by orders of magnitude, even where both are pure Coulomb: they can
+be plotted side by side, but their ratio measures the unit mismatch, not
+the model.
+
+numerical_delay integrates the radial equation in the Coulomb potential with
+its depth capped at the cutoff energy (all energies advanced together per
+radial step) and adds the resulting short-range delay; it is the
+qgu_delay(..., version='numerical') backend. The cutoff only changes the
+short-range phase, so the full Coulomb phase delay remains: these curves
+are on the Wigner-Smith scale above, not that of v1.0/v2.0, and are far
+larger near threshold.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+
+from qgu_model import (AU_TIME_TO_AS, HARTREE_TO_EV, SUBSHELL_L, _occupations,
+                       cutoff_energy, outermost_subshell, qgu_delay)
+from qgu_trace import traced
+
+def sommerfeld_parameter(Zeff, E):
+    """eta = -Zeff / k for an electron of energy E (eV) in an attractive field"""
+    k = np.sqrt(2 * np.asarray(E, dtype=float) / HARTREE_TO_EV)
+    return -np.asarray(Zeff, dtype=float) / k
+
+@traced
+def coulomb_phase(Zeff, E, l=0):
+    """Coulomb phase shift sigma_l = arg Gamma(l + 1 + i eta) in radians"""
+    from scipy.special import loggamma
+    eta = sommerfeld_parameter(Zeff, E)
+    return loggamma(np.asarray(l) + 1 + 1j * eta).imag
+
+@traced
+def coulomb_phase_delay(Zeff, E, l=0):
+    """Wigner-Smith delay d(sigma_l)/dE of the Coulomb phase, in as"""
+    from scipy.special import digamma
+    E = np.asarray(E, dtype=float)
+    Zeff = np.asarray(Zeff, dtype=float)
+    k = np.sqrt(2 * E / HARTREE_TO_EV)
+    eta = -Zeff / k
+    # d(arg Gamma(a + i eta))/d(eta) = Re psi(a + i eta); d(eta)/dE = Zeff / k^3
+    l = np.asarray(l)
+    dsigma = np.broadcast_to(digamma(1 + 1j * eta).real,
+                             np.broadcast_shapes(eta.shape, l.shape)).copy()
+    for j in range(1, int(l.max(initial=0)) + 1):
+        dsigma += np.where(l >= j, j / (j**2 + eta**2), 0.0)
+    return AU_TIME_TO_AS * dsigma * Zeff / k**3
+
+def phase_derivative(phase, E, l=0, rel_step=1e-5):
+    """d(phase(l, E))/dE in as, by central differences in E (eV)"""
+    E = np.asarray(E, dtype=float)
+    dE = rel_step * E
+    dphase = phase(l, E + dE) - phase(l, E - dE)
+    return AU_TIME_TO_AS * HARTREE_TO_EV * dphase / (2 * dE)
+
+@traced
+def wigner_smith_delay(Zeff, E, l=0, short_range=None, rel_step=1e-5):
+    """Wigner-Smith delay of partial wave l in as
+
+    short_range(l, E) returns extra phase shifts delta_l(E) (radians) from
+    the non-Coulomb part of the potential, e.g. quantum defects pi * mu_l(E);
+    it must broadcast like l and E and is differentiated numerically.
+    """
+    tau = coulomb_phase_delay(Zeff, E, l)
+    if short_range is not None:
+        tau = tau + phase_derivative(short_range, E, l, rel_step)
+    return tau
+
+def validate_model(Z, Zeff, E, l=1, version='v2.0', charge=0, short_range=None):
+    """qgu_delay next to the Wigner-Smith delay of partial wave l
+
+    Returns a dict with E, tau_model and tau_ws. The two are on different
+    scales (see the module docstring), so compare their shapes, e.g. the
+    logarithmic slopes, rather than their ratio.
+    """
+    E = np.asarray(E, dtype=float)
+    tau_model = qgu_delay(Z, Zeff, E, version, charge=charge)
+    tau_ws = wigner_smith_delay(Zeff, E, l, short_range)
+    return {'E': E, 'tau_model': tau_model, 'tau_ws': tau_ws}
+
+# ==============================================================================
+# NUMERICAL CONTINUUM SOLUTIONS
+# ==============================================================================
+RADIAL_STEP = 0.01     # bohr
+MATCH_RADIUS = 150.0   # bohr
+MATCH_STEPS = 10       # steps between the two matching points
+DELAY_REL_STEP = 1e-4  # relative energy step of the phase derivative
+
+def cutoff_potential(Zeff, r, r_c):
+    """Coulomb potential -Zeff/r with its depth capped at r < r_c (hartree)"""
+    return -Zeff / np.maximum(r, r_c)
+
+def cutoff_radius(Zeff, Ec):
+    """Radius at which the Coulomb potential reaches the cutoff energy Ec (eV)"""
+    return Zeff * HARTREE_TO_EV / Ec
+
+def numerov_outward(V, E, l, step=RADIAL_STEP, keep=MATCH_STEPS + 1):
+    """Regular solutions of u'' = [2(V - E) + l(l+1)/r^2] u on r = step, 2 step, ...
+
+    V is the potential on that grid with shape (n_r, P) for P potentials and
+    E the energies (hartree), shape (m,). All P x m solutions are advanced
+    together, one Numerov step per radius. Returns u at the last `keep`
+    radii, shape (keep, P, m); the overall scale of each solution is arbitrary.
+    """
+    n_r = len(V)
+    r = step * np.arange(1, n_r + 1)
+    E = np.asarray(E, dtype=float)
+    c = step**2 / 12
+    # w_n = 1 - c g_n; u(0) = 0 removes the r = 0 term, whatever w_0 is
+    centrifugal = l * (l + 1) / r**2
+    w_prev = 1.0
+    u_prev = np.zeros((V.shape[1], len(E)))
+    u = np.full_like(u_prev, step**(l + 1))
+    w = 1 - c * (2 * (V[0][:, None] - E) + centrifugal[0])
+    out = np.empty((keep,) + u.shape)
+    for n in range(1, n_r):
+        w_next = 1 - c * (2 * (V[n][:, None] - E) + centrifugal[n])
+        u_next = (2 * (6 - 5 * w) * u - w_prev * u_prev) / w_next
+        if n >= n_r - keep:
+            out[n - (n_r - keep)] = u_next
+        u_prev, u, w_prev, w = u, u_next, w, w_next
+        if n % 1000 == 0:  # keep the growth under the barrier in range
+            scale = np.abs(u).max(axis=-1, keepdims=True) + 1e-300
+            u_prev, u = u_prev / scale, u / scale
+            out[:max(n - (n_r - keep) + 1, 0)] /= scale
+    return out
+
+def coulomb_momentum(Zeff, E, l, r):
+    """Second-order WKB local momentum P in the Coulomb field
+
+    u = P^(-1/2) sin(int P dr) solves u'' = -q u exactly when
+    P^2 = q + (3/4)(P'/P)^2 - (1/2) P''/P; one iteration from P = sqrt(q)
+    gives P^2 = q + 5 q'^2 / 16 q^2 - q'' / 4 q, which makes the matching
+    error fall off as 1/r^2 instead of 1/r.
+    """
+    L = l * (l + 1)
+    q = 2 * (E + Zeff / r) - L / r**2
+    dq = -2 * Zeff / r**2 + 2 * L / r**3
+    d2q = 4 * Zeff / r**3 - 6 * L / r**4
+    return np.sqrt(q + 5 * dq**2 / (16 * q**2) - d2q / (4 * q))
+
+def wkb_phase(u1, u2, p1, p2, dr):
+    """Phase theta(r1) of u = A p^(-1/2) sin(theta) from u at r1 and r2 = r1 + dr"""
+    delta = dr * (p1 + p2) / 2
+    return np.arctan2(np.sin(delta), u2 * np.sqrt(p2) / (u1 * np.sqrt(p1)) - np.cos(delta))
+
+@traced
+def numerical_phase_shift(Zeff, E, l, r_c, step=RADIAL_STEP, r_match=MATCH_RADIUS):
+    """Phase shift delta_l(E) of the cut-off potential relative to pure Coulomb
+
+    The cut-off and the pure Coulomb potential are integrated together and
+    their WKB phases compared at r_match, where both are Coulomb; errors of
+    the WKB matching cancel in the difference. delta_l is in (-pi/2, pi/2].
+    """
+    E_h = np.asarray(E, dtype=float).ravel() / HARTREE_TO_EV
+    n_r = int(round(r_match / step))
+    r = step * np.arange(1, n_r + 1)
+    V = np.column_stack([cutoff_potential(Zeff, r, r_c), -Zeff / r])
+    u = numerov_outward(V, E_h, l, step)
+    r1, r2 = r[-MATCH_STEPS - 1], r[-1]
+    theta = wkb_phase(u[0], u[-1], coulomb_momentum(Zeff, E_h, l, r1),
+                      coulomb_momentum(Zeff, E_h, l, r2), r2 - r1)
+    delta = theta[0] - theta[1]
+    return (np.pi / 2 - (np.pi / 2 - delta) % np.pi).reshape(np.shape(E))
+
+def outer_l(Z, charge=0):
+    """Orbital angular momentum of the outermost occupied subshell"""
+    occ = _occupations(np.array([Z]), np.array([charge]))[0]
+    return int(SUBSHELL_L[outermost_subshell(occ)])
+
+@traced
+def numerical_delay(Z, Zeff, E, l=None, charge=0):
+    """Wigner-Smith delay (as) of the continuum in the cut-off Coulomb potential
+
+    The potential is -Zeff/r capped at the depth of cutoff_energy(Z, Zeff),
+    and l defaults to the dominant photoionization channel l_outer + 1. The
+    delay is the analytic Coulomb part plus d(delta_l)/dE by central
+    differences; the curve is cached per (element, l, energy grid). See the
+    module docstring for how it compares with qgu_delay's v1.0/v2.0.
+    """
+    if l is None:
+        l = outer_l(Z, charge) + 1
+    E = np.asarray(E, dtype=float)
+    E_1d = np.atleast_1d(E)
+    key = (float(Z), float(Zeff), int(charge), int(l), E_1d.tobytes(), E_1d.shape)
+    tau = coulomb_phase_delay(Zeff, E_1d, l) + _short_range_delay(key)
+    return tau.reshape(E.shape)[()]  # a scalar for scalar E, like the other versions
+
+@lru_cache(maxsize=256)
+def _short_range_delay(key):
+    Z, Zeff, charge, l, data, shape = key
+    E = np.frombuffer(data).reshape(shape)
+    r_c = cutoff_radius(Zeff, cutoff_energy(Z, Zeff, charge=charge))
+    dE = DELAY_REL_STEP * E
+    delta = numerical_phase_shift(Zeff, np.stack([E - dE, E + dE]), l, r_c)
+    ddelta = np.pi / 2 - (np.pi / 2 - (delta[1] - delta[0])) % np.pi
+    tau = AU_TIME_TO_AS * HARTREE_TO_EV * ddelta / (2 * dE)
+    tau.flags.writeable = False
+    return tau
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Interactive Model Explorer
+==========================
+Serves a page with sliders for Q0, each element's Zeff and the correction
+and crossover coefficients, and redraws the delay curves as they move:
+
+    python qgu_server.py                    # http://127.0.0.1:8765/
+    python qgu_server.py --points 1e6 --port 8000
+
+The server listens on the loopback interface only and rejects requests
+addressed to any other host name. Curves are computed with evaluate_samples
+and cached per (element, parameter values, grid); the page asks only for
+the curves whose inputs changed and receives them as raw float32, so moving
+Q0 recomputes every element while moving one Zeff recomputes one curve.
+"""
+
+import argparse
+import json
+import sys
+import time
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from qgu_model import ELEMENTS, Q0, SWEEP_DEFAULTS, evaluate_samples
+
+HOST = '127.0.0.1'
+PORT = 8765
+N_POINTS = 10**5
+CURVE_CACHE_SIZE = 256  # curves kept per server (N_POINTS float32 each)
+
+# Slider ranges; Zeff applies per element
+PARAMETER_RANGES = {'Q0': (2.0, 10.0), 'Zeff': (0.5, 10.0),
+                    'multi_base': (0.0, 0.5), 'multi_slope': (0.0, 1.0),
+                    'pol_core': (0.0, 2.0), 'pol_scale': (0.0, 0.5),
+                    'crossover': (0.1, 3.0), 'exponent': (1.0, 8.0),
+                    'plateau': (0.5, 5.0)}
+
+def energy_axis(n_points=N_POINTS, emin=0.1, emax=100.0):
+    """Energy grid (eV) shared by all curves"""
+    return np.logspace(np.log10(emin), np.log10(emax), int(n_points))
+
+@lru_cache(maxsize=CURVE_CACHE_SIZE)
+def curve(elem, params, grid):
+    """(E_cutoff, tau as float32 bytes) for elem with params on energy_axis(*grid)
+
+    params is a sorted tuple of (name, value) pairs.
+    """
+    samples = {name: [value] for name, value in params}
+    # float32 is what the page receives, so evaluate in it
+    Ec, tau = evaluate_samples(ELEMENTS[elem]['Z'], energy_axis(*grid), samples,
+                               precision='float32')
+    return float(Ec[0]), tau[0].tobytes()
+
+def parse_parameters(query):
+    """Element and sorted (name, value) pairs from a /curve query string
+
+    Raises ValueError for unknown names and values outside PARAMETER_RANGES.
+    """
+    fields = {k: v[-1] for k, v in parse_qs(query, strict_parsing=True).items()}
+    elem = fields.pop('elem', None)
+    if elem not in ELEMENTS:
+        raise ValueError(f"unknown element: {elem!r}")
+    params = []
+    for name, text in fields.items():
+        if name not in PARAMETER_RANGES:
+            raise ValueError(f"unknown parameter: {name!r}")
+        value = float(text)
+        lo, hi = PARAMETER_RANGES[name]
+        if not lo <= value <= hi:
+            raise ValueError(f"{name}={value} outside [{lo}, {hi}]")
+        params.append((name, value))
+    return elem, tuple(sorted(params))
+
+class ExplorerHandler(BaseHTTPRequestHandler):
+    grid = (N_POINTS, 0.1, 100.0)  # replaced per server in serve()
+
+    def do_GET(self):
+        host = self.headers.get('Host', '').rsplit(':', 1)[0]
+        if host not in ('127.0.0.1', 'localhost'):
+            return self._send(403, b'forbidden', 'text/plain')  # DNS rebinding
+        url = urlsplit(self.path)
+        if url.path == '/':
+            return self._send(200, PAGE.encode(), 'text/html; charset=utf-8')
+        if url.path == '/state':
+            state = {'elements': {e: d['Zeff'] for e, d in ELEMENTS.items()},
+                     'defaults': dict(SWEEP_DEFAULTS, Q0=Q0),
+                     'ranges': PARAMETER_RANGES, 'n_points': self.grid[0]}
+            return self._send(200, json.dumps(state).encode(), 'application/json')
+        if url.path == '/grid':
+            log_E = np.log10(energy_axis(*self.grid)).astype(np.float32)
+            return self._send(200, log_E.tobytes(), 'application/octet-stream')
+        if url.path == '/curve':
+            try:
+                elem, params = parse_parameters(url.query)
+            except ValueError as exc:
+                return self._send(400, str(exc).encode(), 'text/plain')
+            t0 = time.perf_counter()
+            Ec, tau = curve(elem, params, self.grid)
+            ms = (time.perf_counter() - t0) * 1e3
+            return self._send(200, tau, 'application/octet-stream',
+                              {'X-E-Cutoff': f'{Ec!r}', 'X-Compute-Ms': f'{ms:.3f}'})
+        self._send(404, b'not found', 'text/plain')
+
+    def _send(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # one line per slider move would flood the terminal
+
+def serve(port=PORT, n_points=N_POINTS, emin=0.1, emax=100.0):
+    """Run the explorer on http://127.0.0.1:port/ until interrupted"""
+    handler = type('Handler', (ExplorerHandler,), {'grid': (int(n_points), emin, emax)})
+    with ThreadingHTTPServer((HOST, port), handler) as server:
+        print(f"Model explorer on http://{HOST}:{server.server_port}/ (Ctrl+C to stop)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--points', type=float, default=N_POINTS,
+                        help='energies per curve (default: 1e5)')
+    parser.add_argument('--emin', type=float, default=0.1, help='eV (default: 0.1)')
+    parser.add_argument('--emax', type=float, default=100.0, help='eV (default: 100)')
+    args = parser.parse_args(argv)
+    serve(args.port, args.points, args.emin, args.emax)
+    return 0
+
+PAGE = r'''<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>QGU model explorer</title>
+<style>
+body { font-family: sans-serif; margin: 1em; display: flex; gap: 1.5em; }
+#controls { width: 19em; font-size: 0.9em; }
+label { display: block; margin-top: 0.4em; }
+input[type=range] { width: 100%; }
+#status { margin-top: 1em; color: #555; font-size: 0.85em; white-space: pre; }
+</style></head>
+<body>
+<div id="controls"></div>
+<div><canvas id="plot" width="900" height="600"></canvas><div id="status"></div></div>
+<script>
+const COLORS = ['#1f77b4', '#d62728', '#2ca02c', '#9467bd', '#ff7f0e'];
+const canvas = document.getElementById('plot'), ctx = canvas.getContext('2d');
+const status = document.getElementById('status');
+let state, logE, values = {}, curves = {}, requested = {}, pending = false;
+
+function slider(name, value, range) {
+  const label = document.createElement('label');
+  const input = Object.assign(document.createElement('input'), {
+    type: 'range', min: range[0], max: range[1], step: (range[1] - range[0]) / 1000, value});
+  const text = document.createElement('span');
+  label.append(name + ' ', text, input);
+  document.getElementById('controls').append(label);
+  const update = () => { values[name] = +input.value; text.textContent = (+input.value).toFixed(3); schedule(); };
+  input.addEventListener('input', update);
+  values[name] = value; text.textContent = value.toFixed(3);
+}
+
+function query(elem) {
+  const params = {elem, Zeff: values['Zeff ' + elem]};
+  for (const name in state.defaults) params[name] = values[name];
+  return new URLSearchParams(params).toString();
+}
+
+function schedule() {
+  if (!pending) { pending = true; requestAnimationFrame(refresh); }
+}
+
+// Curves are reduced on arrival to one (min, max) of log10(tau) per pixel
+// column, so redrawing costs the canvas width, not n_points
+const M = {l: 60, r: 20, t: 20, b: 45};
+let columnOf;
+
+function reduce(tau) {
+  const n = canvas.width, lo = new Float32Array(n).fill(Infinity), hi = new Float32Array(n).fill(-Infinity);
+  for (let i = 0; i < tau.length; i++) {
+    const c = columnOf[i], y = Math.log10(tau[i]);
+    if (y < lo[c]) lo[c] = y;
+    if (y > hi[c]) hi[c] = y;
+  }
+  return {lo, hi};
+}
+
+async function refresh() {
+  pending = false;
+  const t0 = performance.now();
+  const stale = Object.keys(state.elements).filter(e => requested[e] !== query(e));
+  await Promise.all(stale.map(async elem => {
+    const q = query(elem);
+    requested[elem] = q;
+    const response = await fetch('/curve?' + q);
+    if (!response.ok) { status.textContent = await response.text(); return; }
+    const tau = new Float32Array(await response.arrayBuffer());
+    if (requested[elem] === q)  // a newer request supersedes this one
+      curves[elem] = Object.assign(reduce(tau), {Ec: +response.headers.get('X-E-Cutoff'),
+                                                 ms: +response.headers.get('X-Compute-Ms')});
+  }));
+  draw();
+  const lines = Object.entries(curves).map(([e, c]) =>
+    `${e.padEnd(3)} E_cutoff = ${c.Ec.toFixed(2).padStart(8)} eV   compute ${c.ms.toFixed(1)} ms`);
+  status.textContent = lines.join('\n') + `\n${stale.length} curve(s) updated in ` +
+    `${(performance.now() - t0).toFixed(1)} ms (${state.n_points} points each)`;
+}
+
+function draw() {
+  const W = canvas.width, H = canvas.height, m = M;
+  let lo = Infinity, hi = -Infinity;
+  for (const c of Object.values(curves))
+    for (let i = 0; i < W; i++) { if (c.lo[i] < lo) lo = c.lo[i]; if (c.hi[i] > hi) hi = c.hi[i]; }
+  const x0 = logE[0], x1 = logE[logE.length - 1];
+  const px = x => m.l + (x - x0) / (x1 - x0) * (W - m.l - m.r);
+  const py = y => H - m.b - (y - lo) / (hi - lo || 1) * (H - m.t - m.b);
+  ctx.clearRect(0, 0, W, H);
+  ctx.strokeStyle = '#ccc'; ctx.fillStyle = '#333'; ctx.font = '12px sans-serif'; ctx.lineWidth = 1;
+  for (let d = Math.ceil(x0); d <= x1; d++) {
+    ctx.beginPath(); ctx.moveTo(px(d), m.t); ctx.lineTo(px(d), H - m.b); ctx.stroke();
+    ctx.fillText(`1e${d} eV`, px(d) - 18, H - m.b + 16);
+  }
+  for (let d = Math.ceil(lo); d <= hi; d++) {
+    ctx.beginPath(); ctx.moveTo(m.l, py(d)); ctx.lineTo(W - m.r, py(d)); ctx.stroke();
+    ctx.fillText(`1e${d} as`, 5, py(d) + 4);
+  }
+  Object.keys(state.elements).forEach((elem, k) => {
+    const c = curves[elem]; if (!c) return;
+    ctx.strokeStyle = COLORS[k % COLORS.length]; ctx.lineWidth = 2; ctx.beginPath();
+    let started = false;
+    for (let x = 0; x < W; x++) {
+      if (c.lo[x] > c.hi[x]) continue;  // no grid point in this column
+      if (!started) { ctx.moveTo(x, py(c.lo[x])); started = true; }
+      ctx.lineTo(x, py(c.lo[x])); ctx.lineTo(x, py(c.hi[x]));
+    }
+    ctx.stroke();
+    ctx.fillStyle = ctx.strokeStyle; ctx.fillText(elem, W - m.r - 40, m.t + 16 * (k + 1));
+  });
+}
+
+(async () => {
+  state = await (await fetch('/state')).json();
+  logE = new Float32Array(await (await fetch('/grid')).arrayBuffer());
+  const x0 = logE[0], x1 = logE[logE.length - 1], W = canvas.width;
+  columnOf = logE.map(x => Math.round(M.l + (x - x0) / (x1 - x0) * (W - M.l - M.r)));
+  for (const name in state.defaults) slider(name, state.defaults[name], state.ranges[name]);
+  for (const elem in state.elements) slider('Zeff ' + elem, state.elements[elem], state.ranges.Zeff);
+  refresh();
+})();
+</script></body></html>
+'''
+
+if __name__ == '__main__':
+    sys.exit(main())
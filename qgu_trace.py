@@ -0,0 +1,138 @@
+"""
+Timing Instrumentation
+======================
+Opt-in tracing for the model and the figure pipeline. Tracing is off by
+default and every hook then costs one flag check.
+
+    import qgu_trace
+    qgu_trace.enable()
+    ...                                  # build figures, run the model
+    qgu_trace.write_trace('trace.json')  # chrome://tracing / Perfetto
+    qgu_trace.write_trace('trace.csv')   # flat table
+
+span(name) is a context manager around a block; @traced wraps a function;
+stage(name) splits the innermost open span into consecutive stages without
+re-indenting the code (each call ends the previous stage).
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+
+ENABLED = False
+_events = []
+_local = threading.local()
+
+def enable():
+    """Start recording spans"""
+    global ENABLED
+    ENABLED = True
+
+def disable():
+    """Stop recording spans; recorded events are kept"""
+    global ENABLED
+    ENABLED = False
+
+def collect():
+    """Return the recorded events and clear the buffer"""
+    events = list(_events)
+    _events.clear()
+    return events
+
+def merge(events):
+    """Add events recorded elsewhere, e.g. returned from a worker process"""
+    _events.extend(events)
+
+def _stack():
+    if not hasattr(_local, 'stack'):
+        _local.stack = []
+    return _local.stack
+
+class _Span:
+    __slots__ = ('name', 'args', 'start', 'stage')
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+        self.stage = None
+
+    def __enter__(self):
+        _stack().append(self)
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        self.end_stage(end)
+        _stack().pop()
+        _record(self.name, self.start, end, self.args)
+        return False
+
+    def end_stage(self, end):
+        if self.stage is not None:
+            name, start = self.stage
+            _record(f'{self.name}/{name}', start, end, {})
+            self.stage = None
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+def _record(name, start, end, args):
+    _events.append({'name': name, 'ph': 'X', 'ts': start / 1e3,
+                    'dur': (end - start) / 1e3, 'pid': os.getpid(),
+                    'tid': threading.get_ident(), 'args': args})
+
+def span(name, **args):
+    """Context manager timing a block as one span (a no-op when disabled)"""
+    if not ENABLED:
+        return _NULL_SPAN
+    return _Span(name, args)
+
+def stage(name):
+    """End the current stage of the innermost span and start stage `name`"""
+    if not ENABLED:
+        return
+    stack = _stack()
+    if stack:
+        now = time.perf_counter_ns()
+        stack[-1].end_stage(now)
+        stack[-1].stage = (name, now)
+
+def traced(func=None, *, name=None):
+    """Decorator recording each call of func as a span"""
+    if func is None:
+        return functools.partial(traced, name=name)
+    label = name or func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not ENABLED:
+            return func(*args, **kwargs)
+        with _Span(label, {}):
+            return func(*args, **kwargs)
+    return wrapper
+
+def write_trace(path, events=None):
+    """Write events as Chrome trace JSON, or as CSV if path ends in .csv"""
+    events = list(_events) if events is None else events
+    if path.endswith('.csv'):
+        import csv
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['name', 'pid', 'tid', 'start_us', 'duration_us', 'args'])
+            for e in sorted(events, key=lambda e: e['ts']):
+                writer.writerow([e['name'], e['pid'], e['tid'], f"{e['ts']:.3f}",
+                                 f"{e['dur']:.3f}", json.dumps(e['args'])])
+    else:
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)